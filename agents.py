@@ -9,13 +9,33 @@ from crewai import Agent
 from langchain_openai import ChatOpenAI
 from prompt import SYSTEM_PROMPT
 from typing import Optional
+import functools
+import httpx
 import tool_functions
 
 
+@functools.lru_cache(maxsize=16)
+def _get_llm(model_name: str, temperature: float) -> ChatOpenAI:
+    """
+    Get a shared LLM client for (model_name, temperature).
+    
+    Agents reuse one client and its connection pool, so concurrent
+    gradings don't each pay for new TCP/TLS handshakes.
+    """
+    return ChatOpenAI(
+        model=model_name,
+        temperature=temperature,
+        http_client=httpx.Client(
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+        )
+    )
+
+
 def create_grader_agent(
     model_name: str = "gpt-4",
     temperature: float = 0.1,
-    tools_instance = None
+    tools_instance = None,
+    max_execution_time: Optional[int] = 120
 ) -> Agent:
     """
     Create the grader agent with full configuration.
@@ -24,16 +44,14 @@ def create_grader_agent(
         model_name: LLM model to use
         temperature: Temperature for generation (lower = more deterministic)
         tools_instance: Ignored (for backwards compatibility)
+        max_execution_time: Wall-clock ceiling in seconds per grading (None for no limit)
         
     Returns:
         Configured CrewAI Agent
     """
     
-    # Create LLM
-    llm = ChatOpenAI(
-        model=model_name,
-        temperature=temperature
-    )
+    # Get shared LLM client
+    llm = _get_llm(model_name, temperature)
     
     # Use standalone functions as tools
     tools_list = [
@@ -46,7 +64,8 @@ def create_grader_agent(
         tool_functions.get_ab_test_conversions
     ]
     
-    # Create the agent
+    # Create the agent (role, goal and backstory are static so the system
+    # prompt is an identical, cacheable prefix on every call)
     agent = Agent(
         role="Expert Data Science Grader",
         goal="Grade student data science exam submissions accurately and fairly by verifying answers against actual datasets",
@@ -55,7 +74,8 @@ def create_grader_agent(
         llm=llm,
         verbose=True,
         allow_delegation=False,
-        max_iter=15
+        max_iter=5,  # grading needs a few tool calls at most
+        max_execution_time=max_execution_time
     )
     
     return agent
@@ -78,10 +98,7 @@ def create_validation_agent(
         Configured CrewAI Agent
     """
     
-    llm = ChatOpenAI(
-        model=model_name,
-        temperature=temperature
-    )
+    llm = _get_llm(model_name, temperature)
     
     agent = Agent(
         role="Grading Quality Reviewer",
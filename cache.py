@@ -0,0 +1,304 @@
+"""
+Response Cache for LLM Grading System
+=====================================
+
+Persistent exact-match cache of grading results, so identical submissions
+skip the grading agent entirely, plus an optional semantic cache that
+reuses grades for paraphrased answers.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Optional: semantic cache dependencies
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
+
+DEFAULT_CACHE_PATH = ".grading_cache.sqlite"
+DEFAULT_VECTORS_DIR = ".semantic_cache_vectors"
+
+# Embeddings kept in an exact FP32 index until this many are available to
+# train the int8 scalar quantizer for a question
+SQ_TRAIN_SIZE = 1000
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def normalize_answer(student_answer: Any) -> str:
+    """
+    Normalize a student answer for cache lookups.
+
+    Lowercases and collapses whitespace. Structured answers (dicts) are
+    serialized with sorted keys first so equal answers compare equal.
+
+    Args:
+        student_answer: Student's answer (string or structured dict)
+
+    Returns:
+        Normalized answer string
+    """
+    if not isinstance(student_answer, str):
+        student_answer = json.dumps(student_answer, sort_keys=True, default=str)
+    return _WHITESPACE_RE.sub(" ", student_answer.strip().lower())
+
+
+def reference_revision(paths: Sequence[Any]) -> str:
+    """
+    Fingerprint the grading reference files (rubric, ground truth).
+
+    Included in every cache key so that editing a rubric invalidates the
+    grades produced under the old one. File contents are hashed once per
+    (path, mtime); later calls only stat the files.
+
+    Args:
+        paths: Reference file paths
+
+    Returns:
+        Hex SHA-256 digest of the files' contents
+    """
+    stamps = []
+    for path in paths:
+        try:
+            stamps.append((str(path), os.stat(path).st_mtime_ns))
+        except FileNotFoundError:
+            stamps.append((str(path), None))
+    return _hash_reference_files(tuple(stamps))
+
+
+@functools.lru_cache(maxsize=8)
+def _hash_reference_files(stamps: Tuple[Tuple[str, Optional[int]], ...]) -> str:
+    digest = hashlib.sha256()
+    for path, mtime in stamps:
+        if mtime is not None:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def make_cache_key(
+    question_number: int,
+    student_answer: Any,
+    dataset_file: str,
+    model_name: str,
+    reference_rev: str = ""
+) -> str:
+    """
+    Build the exact-match cache key for a submission.
+
+    Args:
+        question_number: Question number (1-10)
+        student_answer: Student's answer
+        dataset_file: Dataset filename
+        model_name: LLM model that produced the grade
+        reference_rev: reference_revision() of the rubric and ground truth
+
+    Returns:
+        Hex SHA-256 digest identifying the submission
+    """
+    payload = {
+        "q": question_number,
+        "a": normalize_answer(student_answer),
+        "d": dataset_file,
+        "m": model_name,
+        "r": reference_rev
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed key/value store for grading results (thread-safe)."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file path (use ":memory:" for a per-process cache)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS grading_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result dict for key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM grading_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __setitem__(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO grading_cache (key, value) VALUES (?, ?)",
+                (key, json.dumps(value))
+            )
+            self._conn.commit()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+        with self._lock:
+            self._conn.execute("DELETE FROM grading_cache")
+            self._conn.commit()
+
+
+def numeric_tokens(text: str) -> frozenset:
+    """Extract the set of numbers mentioned in text (thousands separators removed)."""
+    return frozenset(tok.replace(",", "") for tok in _NUMBER_RE.findall(text))
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache of graded answers, one FAISS index per question (thread-safe).
+
+    A hit requires cosine similarity above the threshold AND the same set of
+    numbers in both answers, so "$6,500" never reuses the grade for "$7,398.53"
+    just because the surrounding sentences look alike.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        threshold: float = 0.92,
+        train_size: int = SQ_TRAIN_SIZE,
+        vectors_dir: str = DEFAULT_VECTORS_DIR
+    ):
+        """
+        Load the embedding model.
+
+        Args:
+            model_name: sentence-transformers model used for embeddings
+            threshold: Minimum cosine similarity to accept a hit
+            train_size: Embeddings per question needed before switching that
+                question's index to int8 scalar quantization
+            vectors_dir: Directory for the per-question FP32 side files the
+                quantized indexes are trained and rebuilt from
+        """
+        if not SEMANTIC_CACHE_AVAILABLE:
+            raise ImportError(
+                "Semantic cache requires sentence-transformers and faiss-cpu "
+                "(pip install sentence-transformers faiss-cpu)"
+            )
+        self.embedder = SentenceTransformer(model_name)
+        self.threshold = threshold
+        self.train_size = train_size
+        self.vectors_dir = vectors_dir
+        os.makedirs(vectors_dir, exist_ok=True)
+        self._sem_index: Dict[int, "faiss.Index"] = {}
+        self._sem_payload: Dict[int, List[Tuple[str, Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def _vectors_path(self, question_number: int) -> str:
+        """Side file holding a question's FP32 embeddings, one row per index entry."""
+        return os.path.join(self.vectors_dir, f"q{question_number}.f32")
+
+    def _load_vectors(self, question_number: int, dim: int) -> "np.ndarray":
+        """Read a question's FP32 embeddings back from its side file as an (n, dim) matrix."""
+        return np.fromfile(self._vectors_path(question_number), dtype="float32").reshape(-1, dim)
+
+    def embed(self, student_answer: Any) -> "np.ndarray":
+        """Embed a student answer as a normalized (1, d) float32 vector."""
+        return self.embedder.encode(
+            [normalize_answer(student_answer)], normalize_embeddings=True
+        ).astype("float32")
+
+    def lookup(
+        self,
+        question_number: int,
+        student_answer: Any,
+        vec: "np.ndarray"
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a previously graded, semantically equivalent answer.
+
+        Args:
+            question_number: Question number (1-10)
+            student_answer: Student's answer
+            vec: Embedding from embed(student_answer)
+
+        Returns:
+            Cached result dict, or None on a miss
+        """
+        with self._lock:
+            index = self._sem_index.get(question_number)
+            if index is None or index.ntotal == 0:
+                return None
+
+            D, I = index.search(vec, 1)
+            if D[0][0] <= self.threshold:
+                return None
+
+            matched_text, result = self._sem_payload[question_number][I[0][0]]
+        if numeric_tokens(matched_text) != numeric_tokens(normalize_answer(student_answer)):
+            return None
+        return result
+
+    def add(
+        self,
+        question_number: int,
+        student_answer: Any,
+        vec: "np.ndarray",
+        result: Dict[str, Any]
+    ) -> None:
+        """Store a graded answer and its embedding (the FP32 copy goes to the side file)."""
+        with self._lock:
+            if question_number not in self._sem_index:
+                self._sem_index[question_number] = faiss.IndexFlatIP(vec.shape[1])
+                self._sem_payload[question_number] = []
+                # The index starts empty, so drop rows left by a previous run
+                open(self._vectors_path(question_number), "wb").close()
+            index = self._sem_index[question_number]
+            index.add(vec)
+            self._sem_payload[question_number].append((normalize_answer(student_answer), result))
+            with open(self._vectors_path(question_number), "ab") as f:
+                vec.astype("float32").tofile(f)
+
+            # Enough samples to train: rebuild as an int8 index (4x smaller,
+            # faster SIMD inner products); later adds go straight into it
+            if isinstance(index, faiss.IndexFlatIP) and index.ntotal >= self.train_size:
+                self._sem_index[question_number] = self._build_quantized_index(
+                    self._load_vectors(question_number, vec.shape[1])
+                )
+
+    def rebuild_index(self, question_number: int) -> None:
+        """Retrain a question's int8 index from its FP32 side file (e.g. after the embeddings drift)."""
+        with self._lock:
+            index = self._sem_index.get(question_number)
+            if index is None or isinstance(index, faiss.IndexFlatIP):
+                return
+            self._sem_index[question_number] = self._build_quantized_index(
+                self._load_vectors(question_number, index.d)
+            )
+
+    @staticmethod
+    def _build_quantized_index(vectors: "np.ndarray") -> "faiss.Index":
+        """Train an 8-bit scalar-quantized inner-product index and load vectors into it."""
+        index = faiss.IndexScalarQuantizer(
+            vectors.shape[1], faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+        )
+        index.train(vectors)
+        index.add(vectors)
+        return index
@@ -5,13 +5,31 @@ CrewAI Crew Configuration for LLM Grading System
 Orchestrates agents and tasks into a cohesive grading system.
 """
 
-from crewai import Crew, Process
+from crewai import Crew, Process, Task
 from agents import create_grader_agent, create_validation_agent
 from tasks import create_grading_task, create_validation_task
-from schemas import GradingResult
-from guardrails import GradingGuardrails
-import json
-from typing import Dict, List, Tuple, Optional
+from schemas import GradingResult, calculate_letter_grade
+import guardrails
+from cache import ResponseCache, SemanticCache, make_cache_key, normalize_answer, reference_revision, DEFAULT_CACHE_PATH
+from prompt import SYSTEM_PROMPT, get_grading_prompt
+from tool_functions import REFERENCE_FILES, resolve_reference_material
+from openai import OpenAI
+import io
+import orjson
+import re
+import threading
+import time
+import numpy as np
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Tuple, Optional
+
+
+# Obvious prompt-injection attempts (instruction overrides, fake role turns)
+_INJECTION_RE = re.compile(
+    r"ignore\s+(?:all\s+)?previous\s+instructions|^\s*(?:system|assistant)\s*:",
+    re.IGNORECASE | re.MULTILINE
+)
 
 
 class GradingCrew:
@@ -22,7 +40,12 @@ class GradingCrew:
         model_name: str = "gpt-4",
         temperature: float = 0.1,
         enable_validation: bool = False,
-        verbose: bool = True
+        verbose: bool = True,
+        enable_cache: bool = True,
+        cache_path: str = DEFAULT_CACHE_PATH,
+        enable_semantic_cache: bool = False,
+        cheap_model: Optional[str] = "gpt-4o-mini",
+        escalation_threshold: float = 0.7
     ):
         """
         Initialize the grading crew.
@@ -32,26 +55,58 @@ class GradingCrew:
             temperature: Temperature for generation
             enable_validation: Whether to use validation agent (slower but more thorough)
             verbose: Whether to print detailed logs
+            enable_cache: Whether to reuse results for identical submissions
+            cache_path: SQLite file backing the response cache
+            enable_semantic_cache: Whether to reuse grades for paraphrased answers
+                (requires sentence-transformers and faiss)
+            cheap_model: Cheaper model tried first; results that are low-confidence
+                or fail output guardrails are re-graded with model_name
+                (None disables routing)
+            escalation_threshold: Minimum confidence to accept a cheap-model grade
         """
         self.model_name = model_name
         self.temperature = temperature
         self.enable_validation = enable_validation
         self.verbose = verbose
+        self.cheap_model = cheap_model if cheap_model != model_name else None
+        self.escalation_threshold = escalation_threshold
         
         # Create agents
-        self.grader_agent = create_grader_agent(
+        self.grader_strong = create_grader_agent(
             model_name=model_name,
             temperature=temperature
         )
+        self.grader_agent = self.grader_strong
+        
+        # Cheap router tier (None when routing is disabled)
+        self.grader_cheap = None
+        if self.cheap_model:
+            self.grader_cheap = create_grader_agent(
+                model_name=self.cheap_model,
+                temperature=temperature
+            )
+        
+        # Agents hold per-execution state, so every thread grades with its own
+        # agents and crews; the calling thread starts with the ones above
+        self._local = threading.local()
+        self._local.graders = {"strong": (self.grader_strong, self._build_crew(self.grader_strong))}
+        if self.grader_cheap is not None:
+            self._local.graders["cheap"] = (self.grader_cheap, self._build_crew(self.grader_cheap))
         
         if enable_validation:
             self.validation_agent = create_validation_agent(
-                model_name=model_name,
+                model_name=self.cheap_model or model_name,
                 temperature=0.0  # Validation should be deterministic
             )
         
-        # Initialize guardrails
-        self.guardrails = GradingGuardrails()
+        # Shared guardrails instance
+        self.guardrails = guardrails._DEFAULT
+        
+        # Exact-match response cache (persists across runs)
+        self.cache = ResponseCache(cache_path) if enable_cache else None
+        
+        # Semantic cache for paraphrased answers (in-memory, per run)
+        self.semantic_cache = SemanticCache() if enable_semantic_cache else None
     
     def grade_single_question(
         self,
@@ -83,45 +138,80 @@ class GradingCrew:
             'student_answer': student_answer
         }
         
-        valid, errors = self.guardrails.input_guards.validate_student_submission(submission)
+        valid, errors, _ = self.guardrails.input_guards.validate_student_submission(submission)
         if not valid:
             messages.extend([f"❌ {err}" for err in errors])
             return False, self.guardrails.error_handler.create_fallback_result(
                 question_number, student_answer, errors[0]
             ), messages
         
-        # Step 2: Create grading task
-        task = create_grading_task(
-            agent=self.grader_agent,
-            question_number=question_number,
-            question_text=question_text,
-            student_answer=student_answer,
-            dataset_file=dataset_file
-        )
+        # Step 1b: Deterministic decisions that need no LLM call
+        direct_result = self._trivial_decision(question_number, question_text, student_answer)
+        if direct_result is not None:
+            messages.append("⚡ DIRECT decision (no LLM call)")
+            return True, direct_result, messages
         
-        # Step 3: Create and run crew
-        crew = Crew(
-            agents=[self.grader_agent],
-            tasks=[task],
-            process=Process.sequential,
-            verbose=self.verbose
-        )
+        # Step 2: Exact-match cache lookup
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(
+                question_number, student_answer, dataset_file, self.model_name,
+                reference_revision(REFERENCE_FILES)
+            )
+            hit = self.cache.get(cache_key)
+            if hit is not None:
+                # Normalized answers match, but report this submission's own text
+                grading_result = GradingResult(**{**hit, 'student_answer': student_answer})
+                messages.append(f"⚡ Cache hit: {grading_result.points_earned}/{grading_result.points_possible} points")
+                return True, grading_result, messages
+        
+        # Step 2b: Semantic cache lookup (paraphrased answers)
+        answer_vec = None
+        if self.semantic_cache is not None:
+            answer_vec = self.semantic_cache.embed(student_answer)
+            hit = self.semantic_cache.lookup(question_number, student_answer, answer_vec)
+            if hit is not None:
+                grading_result = GradingResult(**{**hit, 'student_answer': student_answer})
+                messages.append(f"⚡ Semantic cache hit: {grading_result.points_earned}/{grading_result.points_possible} points")
+                return True, grading_result, messages
         
         try:
-            # Execute grading
-            result = crew.kickoff()
+            # Step 3: Grade with the cheap model, escalating when it is unsure
+            grading_result = None
+            if self.grader_cheap is not None:
+                try:
+                    grading_result = self._run_grader(
+                        "cheap", question_number, question_text,
+                        student_answer, dataset_file
+                    )
+                except Exception as e:
+                    messages.append(f"⚠️  Cheap model failed: {str(e)}")
+                
+                if grading_result is not None:
+                    reason = self._escalation_reason(grading_result, question_number)
+                    if reason is not None:
+                        messages.append(f"⚠️  Escalating to {self.model_name} ({reason})")
+                        grading_result = None
             
-            # Parse result - CrewAI returns the Pydantic model directly
-            if isinstance(result, GradingResult):
-                grading_result = result
-            elif isinstance(result, dict):
-                grading_result = GradingResult(**result)
-            elif isinstance(result, str):
-                grading_result = GradingResult(**json.loads(result))
-            else:
-                # Try to convert to dict first
-                result_dict = result.dict() if hasattr(result, 'dict') else dict(result)
-                grading_result = GradingResult(**result_dict)
+            if grading_result is None:
+                grading_result = self._run_grader(
+                    "strong", question_number, question_text,
+                    student_answer, dataset_file
+                )
+                # The strong model is the last resort: an invalid grade goes to manual review
+                valid, errors, _ = self.guardrails.output_guards.validate_llm_response(
+                    grading_result.cached_dump(), question_number
+                )
+                if not valid:
+                    raise ValueError(errors[0])
+            
+            if cache_key is not None:
+                self.cache[cache_key] = grading_result.cached_dump()
+            if answer_vec is not None:
+                self.semantic_cache.add(
+                    question_number, student_answer, answer_vec,
+                    grading_result.cached_dump()
+                )
             
             messages.append(f"✅ Grading complete: {grading_result.points_earned}/{grading_result.points_possible} points")
             
@@ -133,47 +223,397 @@ class GradingCrew:
                 question_number, student_answer, str(e)
             ), messages
     
+    def _trivial_decision(
+        self,
+        question_number: int,
+        question_text: str,
+        student_answer: Any
+    ) -> Optional[GradingResult]:
+        """
+        Resolve submissions that can be graded without the LLM.
+        
+        Empty answers (nothing but whitespace or punctuation), answers that
+        just repeat the question, and prompt-injection attempts all receive
+        0 points. Over-long answers
+        are already rejected by input validation.
+        
+        Args:
+            question_number: Question number (1-10)
+            question_text: Full question text
+            student_answer: Student's answer (string or structured dict)
+            
+        Returns:
+            A 0-point GradingResult, or None if the LLM is needed
+        """
+        if isinstance(student_answer, dict):
+            answer_text = " ".join(str(v) for v in student_answer.values())
+        else:
+            answer_text = str(student_answer)
+        answer_text = answer_text.strip()
+        
+        if not any(ch.isalnum() for ch in answer_text):
+            # Short answers like "$6,500", "0.92" or "B" can be fully correct,
+            # so only answers without a single letter or digit are skipped
+            reason = "Answer contains no letters or digits"
+        elif answer_text.lower() == question_text.strip().lower():
+            reason = "Answer only repeats the question"
+        elif _INJECTION_RE.search(answer_text):
+            reason = "Answer contains a prompt-injection attempt"
+        else:
+            return None
+        
+        return GradingResult(
+            question_number=question_number,
+            points_earned=0.0,
+            points_possible=10,
+            is_correct=False,
+            student_answer=student_answer,
+            correct_answer="[NOT EVALUATED]",
+            points_breakdown={
+                "correct_answer": 0,
+                "showing_work": 0,
+                "interpretation": 0
+            },
+            error_type="incomplete_work",
+            specific_errors=[
+                reason,
+                "No gradable answer or work was provided"
+            ],
+            what_was_correct=[],
+            feedback=f"This submission received 0 points without detailed grading: {reason.lower()}. "
+                     "Please submit a complete answer that shows your work.",
+            data_references=[]
+        )
+    
+    def _run_grader(
+        self,
+        tier: str,
+        question_number: int,
+        question_text: str,
+        student_answer: str,
+        dataset_file: str
+    ) -> GradingResult:
+        """
+        Run one grading pass with the calling thread's grader for a tier.
+        
+        Args:
+            tier: "cheap" or "strong"
+            question_number: Question number (1-10)
+            question_text: Full question text
+            student_answer: Student's answer
+            dataset_file: Dataset filename
+            
+        Returns:
+            Parsed GradingResult
+        """
+        agent, crew = self._thread_grader(tier)
+        task = create_grading_task(
+            agent=agent,
+            question_number=question_number,
+            question_text=question_text,
+            student_answer=student_answer,
+            dataset_file=dataset_file
+        )
+        
+        # This thread's crew is only ever used by this thread, so it can simply
+        # take the new task (its agents, handlers and validators are its own)
+        crew.tasks = [task]
+        
+        # Execute grading
+        result = crew.kickoff()
+        
+        # Parse result - CrewAI returns the Pydantic model directly
+        if isinstance(result, GradingResult):
+            return result
+        elif isinstance(result, dict):
+            return GradingResult(**result)
+        elif isinstance(result, str):
+            # The fast decode paths skip Pydantic, so the guardrail verdict is
+            # what rejects bad breakdowns, point ranges and question numbers
+            valid, errors, parsed = self.guardrails.output_guards.validate_llm_response_bytes(
+                result.encode(), question_number
+            )
+            if not valid:
+                raise ValueError(errors[0])
+            return parsed
+        else:
+            # Try to convert to dict first
+            result_dict = result.dict() if hasattr(result, 'dict') else dict(result)
+            return GradingResult(**result_dict)
+    
+    def _thread_grader(self, tier: str) -> Tuple[Any, Crew]:
+        """
+        Return the calling thread's grader agent and crew for a tier.
+        
+        CrewAI agents rebuild and keep their executor (tools, task, messages)
+        on every execution, so concurrent gradings sharing an agent could run
+        on each other's prompt state. Worker threads build their own agents
+        on first use; the LLM client and its connection pool stay shared.
+        """
+        graders = getattr(self._local, "graders", None)
+        if graders is None:
+            graders = self._local.graders = {}
+        if tier not in graders:
+            model_name = self.cheap_model if tier == "cheap" else self.model_name
+            agent = create_grader_agent(model_name=model_name, temperature=self.temperature)
+            graders[tier] = (agent, self._build_crew(agent))
+        return graders[tier]
+    
+    def _build_crew(self, agent) -> Crew:
+        """Build a thread's reusable crew for a grader agent (placeholder task swapped per call)."""
+        placeholder = Task(
+            description="Placeholder grading task",
+            expected_output="A grading result",
+            agent=agent
+        )
+        return Crew(
+            agents=[agent],
+            tasks=[placeholder],
+            process=Process.sequential,
+            verbose=self.verbose
+        )
+    
+    def _escalation_reason(self, result: GradingResult, question_number: int) -> Optional[str]:
+        """
+        Why a cheap-model grade should be redone by the strong model.
+        
+        Args:
+            result: Cheap-model grading result
+            question_number: Question number the submission was for
+            
+        Returns:
+            Reason for escalating, or None to accept the grade
+        """
+        if result.confidence < self.escalation_threshold:
+            return f"confidence {result.confidence:.2f}"
+        valid, errors, _ = self.guardrails.output_guards.validate_llm_response(
+            result.cached_dump(), question_number
+        )
+        return None if valid else errors[0]
+    
     def grade_multiple_questions(
         self,
         submissions: List[Dict],
-        student_id: Optional[str] = None
+        student_id: Optional[str] = None,
+        max_workers: int = 8
+    ) -> Tuple[List[GradingResult], List[str]]:
+        """
+        Grade multiple questions concurrently.
+        
+        Identical submissions (same question, dataset and normalized answer)
+        are graded once and the result is copied to every duplicate.
+        Results are returned in submission order regardless of completion order.
+        
+        Args:
+            submissions: List of dicts with question_number, question_text, 
+                        student_answer, dataset_file
+            student_id: Optional student ID
+            max_workers: Maximum number of concurrent grading calls
+            
+        Returns:
+            Tuple of (grading_results, all_messages)
+        """
+        
+        results: List[Optional[GradingResult]] = [None] * len(submissions)
+        message_lists: List[List[str]] = [[] for _ in submissions]
+        
+        # Group duplicates so each unique submission costs one LLM call
+        groups: Dict[Tuple, List[int]] = defaultdict(list)
+        for i, submission in enumerate(submissions):
+            key = (
+                submission['question_number'],
+                submission['dataset_file'],
+                normalize_answer(submission['student_answer'])
+            )
+            groups[key].append(i)
+        
+        # Each grading is independent and I/O bound, so overlap the LLM calls
+        # (every worker thread grades with its own agents, see _thread_grader)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for indices in groups.values():
+                submission = submissions[indices[0]]
+                future = executor.submit(
+                    self.grade_single_question,
+                    question_number=submission['question_number'],
+                    question_text=submission['question_text'],
+                    student_answer=submission['student_answer'],
+                    dataset_file=submission['dataset_file'],
+                    student_id=student_id
+                )
+                futures[future] = indices
+            
+            done = 0
+            for future in as_completed(futures):
+                indices = futures[future]
+                success, result, messages = future.result()
+                for n, i in enumerate(indices):
+                    done += 1
+                    if n == 0:
+                        results[i] = result
+                        message_lists[i] = messages
+                    else:
+                        # Own copy per duplicate, keeping that student's exact answer
+                        answer = submissions[i]['student_answer']
+                        results[i] = result.model_copy(
+                            update={'student_answer': answer} if isinstance(answer, str) else None
+                        )
+                        message_lists[i] = [f"⚡ Duplicate of submission {indices[0] + 1} (no LLM call)"]
+                    
+                    # Print summary
+                    print(f"\n{'='*70}")
+                    print(f"Graded Question {submissions[i]['question_number']} ({done}/{len(submissions)})")
+                    print(f"{'='*70}")
+                    if success:
+                        print(f"✅ Grade: {result.points_earned}/{result.points_possible} points")
+                    else:
+                        print(f"❌ Grading failed, flagged for manual review")
+        
+        all_messages = [msg for messages in message_lists for msg in messages]
+        
+        return results, all_messages
+    
+    def grade_multiple_questions_batch(
+        self,
+        submissions: List[Dict],
+        student_id: Optional[str] = None,
+        poll_interval: float = 30.0
     ) -> Tuple[List[GradingResult], List[str]]:
         """
-        Grade multiple questions.
+        Grade multiple questions through the OpenAI Batch API.
+        
+        For non-interactive runs (overnight re-grading, whole classes): all
+        prompts go into one batch job, which costs half as much as
+        synchronous calls but may take up to 24h. There is no agent loop, so
+        the rubric, ground truth and dataset are resolved locally and
+        embedded in each prompt instead of being fetched through tools.
         
         Args:
             submissions: List of dicts with question_number, question_text, 
                         student_answer, dataset_file
             student_id: Optional student ID
+            poll_interval: Seconds between batch status checks
             
         Returns:
             Tuple of (grading_results, all_messages)
         """
         
-        results = []
+        results: List[Optional[GradingResult]] = [None] * len(submissions)
         all_messages = []
+        cache_keys = {}
+        lines: List[bytes] = []
+        reference_rev = reference_revision(REFERENCE_FILES) if self.cache is not None else ""
         
+        # Step 1: Resolve what we can locally, package the rest as JSONL
         for i, submission in enumerate(submissions):
-            print(f"\n{'='*70}")
-            print(f"Grading Question {submission['question_number']} ({i+1}/{len(submissions)})")
-            print(f"{'='*70}\n")
+            question_number = submission['question_number']
+            student_answer = submission['student_answer']
+            
+            valid, errors, _ = self.guardrails.input_guards.validate_student_submission(submission)
+            if not valid:
+                all_messages.extend([f"❌ Q{question_number}: {err}" for err in errors])
+                results[i] = self.guardrails.error_handler.create_fallback_result(
+                    question_number, student_answer, errors[0]
+                )
+                continue
+            
+            direct_result = self._trivial_decision(
+                question_number, submission['question_text'], student_answer
+            )
+            if direct_result is not None:
+                all_messages.append(f"⚡ Q{question_number}: DIRECT decision (no LLM call)")
+                results[i] = direct_result
+                continue
+            
+            if self.cache is not None:
+                cache_keys[i] = make_cache_key(
+                    question_number, student_answer,
+                    submission['dataset_file'], self.model_name, reference_rev
+                )
+                hit = self.cache.get(cache_keys[i])
+                if hit is not None:
+                    all_messages.append(f"⚡ Q{question_number}: Cache hit")
+                    results[i] = GradingResult(**{**hit, 'student_answer': student_answer})
+                    continue
             
-            success, result, messages = self.grade_single_question(
-                question_number=submission['question_number'],
+            _, user_prompt = get_grading_prompt(
+                question_number=question_number,
                 question_text=submission['question_text'],
-                student_answer=submission['student_answer'],
-                dataset_file=submission['dataset_file'],
-                student_id=student_id
+                student_answer=student_answer,
+                dataset_file=submission['dataset_file']
             )
+            reference = resolve_reference_material(question_number, submission['dataset_file'])
+            lines.append(orjson.dumps({
+                "custom_id": f"q{question_number}_s{student_id}_{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model_name,
+                    "temperature": self.temperature,
+                    "response_format": {"type": "json_object"},
+                    "messages": [
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": f"{reference}\n\n{user_prompt}"}
+                    ]
+                }
+            }))
+        
+        # Step 2: Submit the batch job and wait for it
+        if lines:
+            client = OpenAI()
+            batch_file = client.files.create(
+                file=("grading_batch.jsonl", io.BytesIO(b"\n".join(lines))),
+                purpose="batch"
+            )
+            batch = client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            print(f"Submitted batch {batch.id} ({len(lines)} requests)")
             
-            results.append(result)
-            all_messages.extend(messages)
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                time.sleep(poll_interval)
+                batch = client.batches.retrieve(batch.id)
+                print(f"  Batch status: {batch.status}")
             
-            # Print summary
-            if success:
-                print(f"✅ Grade: {result.points_earned}/{result.points_possible} points")
+            if batch.status != "completed" or not batch.output_file_id:
+                all_messages.append(f"❌ Batch {batch.id} ended with status {batch.status}")
             else:
-                print(f"❌ Grading failed, flagged for manual review")
+                output = client.files.content(batch.output_file_id).text
+                
+                # Step 3: Parse each returned line back into a GradingResult
+                for line in output.splitlines():
+                    if not line.strip():
+                        continue
+                    record = orjson.loads(line)
+                    i = int(record['custom_id'].rsplit('_', 1)[1])
+                    question_number = submissions[i]['question_number']
+                    try:
+                        if record.get('error'):
+                            raise ValueError(record['error'].get('message', record['error']))
+                        content = record['response']['body']['choices'][0]['message']['content']
+                        valid, errors, results[i] = self.guardrails.output_guards.validate_llm_response_bytes(
+                            content.encode(), question_number
+                        )
+                        if not valid:
+                            raise ValueError(errors[0])
+                        if i in cache_keys:
+                            self.cache[cache_keys[i]] = results[i].cached_dump()
+                        all_messages.append(f"✅ Q{question_number}: {results[i].points_earned}/{results[i].points_possible} points")
+                    except Exception as e:
+                        all_messages.append(f"❌ Q{question_number}: Grading failed: {str(e)}")
+                        results[i] = self.guardrails.error_handler.create_fallback_result(
+                            question_number, submissions[i]['student_answer'], str(e)
+                        )
+        
+        # Anything the batch did not return is flagged for manual review
+        for i, submission in enumerate(submissions):
+            if results[i] is None:
+                results[i] = self.guardrails.error_handler.create_fallback_result(
+                    submission['question_number'], submission['student_answer'],
+                    "No result returned by batch job"
+                )
         
         return results, all_messages
     
@@ -195,41 +635,18 @@ class GradingCrew:
             Complete exam report dict
         """
         
-        total_earned = sum(r.points_earned for r in results)
-        total_possible = sum(r.points_possible for r in results)
+        earned = np.fromiter((r.points_earned for r in results), dtype=np.float64, count=len(results))
+        possible = np.fromiter((r.points_possible for r in results), dtype=np.int64, count=len(results))
+        total_earned = float(earned.sum())
+        total_possible = int(possible.sum())
         percentage = (total_earned / total_possible * 100) if total_possible > 0 else 0
         
         # Determine letter grade
-        if percentage >= 93:
-            letter_grade = "A"
-        elif percentage >= 90:
-            letter_grade = "A-"
-        elif percentage >= 87:
-            letter_grade = "B+"
-        elif percentage >= 83:
-            letter_grade = "B"
-        elif percentage >= 80:
-            letter_grade = "B-"
-        elif percentage >= 77:
-            letter_grade = "C+"
-        elif percentage >= 73:
-            letter_grade = "C"
-        elif percentage >= 70:
-            letter_grade = "C-"
-        elif percentage >= 60:
-            letter_grade = "D"
-        else:
-            letter_grade = "F"
+        letter_grade = calculate_letter_grade(percentage)
         
         # Identify strengths and weaknesses
-        strengths = []
-        areas_for_improvement = []
-        
-        for result in results:
-            if result.points_earned >= 8:
-                strengths.append(f"Strong performance on Q{result.question_number}")
-            elif result.points_earned <= 5:
-                areas_for_improvement.append(f"Review concepts from Q{result.question_number}")
+        strengths = [f"Strong performance on Q{results[i].question_number}" for i in np.where(earned >= 8)[0]]
+        areas_for_improvement = [f"Review concepts from Q{results[i].question_number}" for i in np.where(earned <= 5)[0]]
         
         return {
             "student_name": student_name,
@@ -239,7 +656,7 @@ class GradingCrew:
             "total_points_possible": total_possible,
             "percentage": round(percentage, 2),
             "letter_grade": letter_grade,
-            "question_results": [r.dict() for r in results],
+            "question_results": [r.cached_dump() for r in results],
             "strengths": strengths if strengths else ["Consistent effort across all questions"],
             "areas_for_improvement": areas_for_improvement if areas_for_improvement else ["Continue current study approach"],
             "overall_feedback": f"You scored {total_earned}/{total_possible} points ({percentage:.1f}%). " +
@@ -1,15 +1,243 @@
 import json
-from typing import Dict, List, Tuple, Optional, Any
-from pydantic import ValidationError
-from schemas import GradingResult, ExamGradingReport
-from datetime import datetime
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Annotated, Any, Deque, Dict, List, Literal, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+import orjson
+from pydantic import TypeAdapter, ValidationError
+from schemas import BREAKDOWN_FIELDS, GradingResult, ExamGradingReport, split_points_breakdown
+
+# Optional: Aho-Corasick automaton for multi-pattern scans
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Optional: msgspec for decoding raw LLM output straight into a typed struct
+try:
+    import msgspec
+    from msgspec import Meta
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+
+# Distinguishes an absent key from an explicit None
+_MISSING = object()
+
+_REQUIRED_SUBMISSION_FIELDS = ('question_number', 'student_answer')
+
+# Fields an LLM response cannot be graded without
+_HARD_REQUIRED_FIELDS = ('question_number', 'points_earned', 'feedback')
+
+# Potential prompt injection attempts
+_DANGEROUS_PATTERNS = (
+    "ignore previous instructions",
+    "disregard all",
+    "forget everything",
+    "system:",
+    "assistant:",
+)
+
+# Placeholder/template text that should never reach a student
+_PLACEHOLDER_INDICATORS = (
+    "[insert",
+    "TODO",
+    "FIXME",
+    "xxx",
+    "...",
+)
+
+# Constant parts of the manual-review fallback result
+_FALLBACK_BREAKDOWN = {
+    "correct_answer_pts": 0.0,
+    "showing_work_pts": 0.0,
+    "interpretation_pts": 0.0
+}
+
+_FALLBACK_FEEDBACK_TMPL = """This submission could not be automatically graded due to a system error.
+
+Error details: {err}
+
+This answer has been flagged for manual review by an instructor. You will receive 
+your grade and feedback within 24 hours.
+
+If you believe this is an error, please contact your instructor."""
+
+_ERROR_TYPES = frozenset({
+    "wrong_calculation",
+    "wrong_methodology",
+    "missing_data",
+    "incomplete_work",
+    "no_error",
+    None,
+})
+
+# Grading error types that must cite the data
+_DATA_ERROR_TYPES = frozenset({"wrong_calculation", "missing_data"})
+
+# Failure kinds for retry decisions
+_RETRYABLE_ERRORS = frozenset({
+    "llm_error",
+    "network_error",
+    "timeout_error",
+    "rate_limit_error"
+})
+_NONRETRYABLE_ERRORS = frozenset({"validation_error", "invalid_input"})
+
+
+class _MultiPatternScanner:
+    """
+    Case-insensitive substring scan for many patterns in one pass over the text.
+    
+    Uses a pyahocorasick automaton when installed, otherwise one compiled
+    regex alternation.
+    """
+    
+    def __init__(self, patterns: Sequence[str]):
+        self._by_lower = {p.lower(): p for p in patterns}
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for lowered, pattern in self._by_lower.items():
+                self._automaton.add_word(lowered, pattern)
+            self._automaton.make_automaton()
+        else:
+            # One named group per pattern, so a match says which pattern hit
+            # without lowercasing the matched text
+            self._by_group = {f"p{i}": p for i, p in enumerate(self._by_lower.values())}
+            self._regex = re.compile(
+                "|".join(f"(?P<{name}>{re.escape(p)})" for name, p in self._by_group.items()),
+                re.IGNORECASE
+            )
+    
+    def search(self, text: str) -> bool:
+        """Whether any pattern occurs in text."""
+        if AHOCORASICK_AVAILABLE:
+            return next(self._automaton.iter(text.lower()), None) is not None
+        return self._regex.search(text) is not None
+    
+    def matches(self, text: str) -> List[str]:
+        """Patterns occurring in text, each reported once in first-hit order."""
+        if AHOCORASICK_AVAILABLE:
+            found = (pattern for _, pattern in self._automaton.iter(text.lower()))
+        else:
+            found = (self._by_group[m.lastgroup] for m in self._regex.finditer(text))
+        return list(dict.fromkeys(found))
+
+
+class ParsedInput(NamedTuple):
+    """Submission fields as read by input validation, for reuse downstream."""
+    qnum: Any
+    answer: Any
+
+
+@dataclass(frozen=True)
+class _GradingView:
+    """Derived values of a GradingResult that several checks need, computed once."""
+    feedback_len: int
+    breakdown_sum: float
+    breakdown_has_points: bool
+    n_specific_errors: int
+    n_data_references: int
+    
+    @classmethod
+    def of(cls, result: GradingResult) -> "_GradingView":
+        return cls(
+            feedback_len=len(result.feedback),
+            breakdown_sum=result.breakdown_sum(),
+            breakdown_has_points=(
+                result.correct_answer_pts > 0
+                or result.showing_work_pts > 0
+                or result.interpretation_pts > 0
+            ),
+            n_specific_errors=len(result.specific_errors),
+            n_data_references=len(result.data_references)
+        )
+
+
+if MSGSPEC_AVAILABLE:
+    class _GradingResultStruct(msgspec.Struct):
+        """msgspec mirror of GradingResult's schema (field-level constraints only)."""
+        question_number: Annotated[int, Meta(ge=1, le=10)]
+        points_earned: Annotated[float, Meta(ge=0, le=10)]
+        is_correct: bool
+        student_answer: str
+        correct_answer: str
+        points_breakdown: Dict[str, float]
+        feedback: Annotated[str, Meta(min_length=50)]
+        points_possible: int = 10
+        error_type: Optional[Literal[
+            "wrong_calculation",
+            "wrong_methodology",
+            "missing_data",
+            "incomplete_work",
+            "no_error"
+        ]] = None
+        specific_errors: List[str] = []
+        what_was_correct: List[str] = []
+        data_references: List[str] = []
+        confidence: Annotated[float, Meta(ge=0, le=1)] = 1.0
+
+
+def _is_number(v: Any) -> bool:
+    """int or float, but not bool."""
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _is_str_list(v: Any) -> bool:
+    return isinstance(v, list) and all(isinstance(item, str) for item in v)
+
+
+def _is_well_formed(response: Dict[str, Any]) -> bool:
+    """
+    Cheap structural check of an LLM response against the GradingResult schema
+    (with its breakdown already split, see split_points_breakdown).
+    
+    True means model_construct can be used safely; anything unusual (missing
+    fields, dict answers, out-of-range values) goes through full Pydantic
+    validation instead, which coerces or reports it.
+    """
+    try:
+        qnum = response['question_number']
+        points = response['points_earned']
+        breakdown = [response[field] for _, field in BREAKDOWN_FIELDS]
+        feedback = response['feedback']
+        if not (isinstance(response['is_correct'], bool)
+                and isinstance(response['student_answer'], str)
+                and isinstance(response['correct_answer'], str)):
+            return False
+    except (KeyError, TypeError):
+        return False
+    
+    possible = response.get('points_possible', 10)
+    confidence = response.get('confidence', 1.0)
+    return (
+        isinstance(qnum, int) and not isinstance(qnum, bool) and 1 <= qnum <= 10
+        and _is_number(points) and 0 <= points <= 10
+        and isinstance(possible, int) and not isinstance(possible, bool)
+        and all(_is_number(v) for v in breakdown)
+        and isinstance(feedback, str) and len(feedback) >= 50
+        and response.get('error_type') in _ERROR_TYPES
+        and _is_number(confidence) and 0 <= confidence <= 1
+        and _is_str_list(response.get('specific_errors', []))
+        and _is_str_list(response.get('what_was_correct', []))
+        and _is_str_list(response.get('data_references', []))
+    )
 
 
 class InputGuardrails:
     """Validate student submissions before processing."""
     
+    # Compiled once at import
+    _DANGEROUS_SCANNER = _MultiPatternScanner(_DANGEROUS_PATTERNS)
+    
     @staticmethod
-    def validate_student_submission(submission: Dict[str, Any]) -> Tuple[bool, List[str]]:
+    def validate_student_submission(
+        submission: Dict[str, Any]
+    ) -> Tuple[bool, List[str], ParsedInput]:
         """
         Validate a student submission before grading.
         
@@ -17,37 +245,43 @@ class InputGuardrails:
             submission: Student's answer submission
             
         Returns:
-            Tuple of (is_valid, error_messages)
+            Tuple of (is_valid, error_messages, parsed_input); parsed_input
+            holds the fields as read (0 / "" when absent) even if invalid
         """
         errors = []
+        values = tuple(submission.get(field, _MISSING) for field in _REQUIRED_SUBMISSION_FIELDS)
+        qnum, answer = values
         
         # Check required fields
-        required_fields = ['question_number', 'student_answer']
-        for field in required_fields:
-            if field not in submission or submission[field] is None:
+        for field, value in zip(_REQUIRED_SUBMISSION_FIELDS, values):
+            if value is _MISSING or value is None:
                 errors.append(f"Missing required field: {field}")
         
         # Validate question number
-        if 'question_number' in submission:
-            qnum = submission['question_number']
+        if qnum is not _MISSING:
             if not isinstance(qnum, int) or qnum < 1 or qnum > 10:
                 errors.append(f"Invalid question_number: must be integer 1-10, got {qnum}")
         
-        # Validate answer is not empty
-        if 'student_answer' in submission:
-            answer = submission['student_answer']
-            if isinstance(answer, str) and len(answer.strip()) == 0:
-                errors.append("student_answer cannot be empty")
-            elif answer == "" or answer is None:
-                errors.append("student_answer is missing or None")
-        
-        # Check answer length (prevent abuse)
-        if 'student_answer' in submission:
-            answer_str = str(submission['student_answer'])
-            if len(answer_str) > 5000:
-                errors.append(f"student_answer too long ({len(answer_str)} chars, max 5000)")
-        
-        return len(errors) == 0, errors
+        if answer is not _MISSING:
+            # Validate answer is not empty
+            if isinstance(answer, str):
+                if len(answer.strip()) == 0:
+                    errors.append("student_answer cannot be empty")
+                answer_len = len(answer)
+            else:
+                if answer is None:
+                    errors.append("student_answer is missing or None")
+                answer_len = len(str(answer))
+            
+            # Check answer length (prevent abuse)
+            if answer_len > 5000:
+                errors.append(f"student_answer too long ({answer_len} chars, max 5000)")
+        
+        parsed = ParsedInput(
+            qnum=0 if qnum is _MISSING else qnum,
+            answer="" if answer is _MISSING else answer
+        )
+        return len(errors) == 0, errors, parsed
     
     @staticmethod
     def sanitize_student_answer(answer: str) -> str:
@@ -61,20 +295,10 @@ class InputGuardrails:
             Sanitized answer
         """
         # Remove potential prompt injection attempts
-        dangerous_patterns = [
-            "ignore previous instructions",
-            "disregard all",
-            "forget everything",
-            "system:",
-            "assistant:",
-        ]
-        
         sanitized = answer
-        for pattern in dangerous_patterns:
-            if pattern.lower() in sanitized.lower():
-                # Flag but don't remove - let human review
-                sanitized = f"[FLAGGED: potential prompt injection] {sanitized}"
-                break
+        if InputGuardrails._DANGEROUS_SCANNER.search(sanitized):
+            # Flag but don't remove - let human review
+            sanitized = f"[FLAGGED: potential prompt injection] {sanitized}"
         
         return sanitized.strip()
 
@@ -82,6 +306,11 @@ class InputGuardrails:
 class OutputGuardrails:
     """Validate LLM outputs before accepting them."""
     
+    # Compiled once at import
+    _PLACEHOLDER_SCANNER = _MultiPatternScanner(_PLACEHOLDER_INDICATORS)
+    _STRUCT_DECODER = msgspec.json.Decoder(_GradingResultStruct) if MSGSPEC_AVAILABLE else None
+    _GRADING_ADAPTER = TypeAdapter(GradingResult)
+    
     @staticmethod
     def validate_llm_response(
         response: Dict[str, Any],
@@ -97,11 +326,21 @@ class OutputGuardrails:
         Returns:
             Tuple of (is_valid, error_messages, parsed_result)
         """
+        # Obviously broken responses are rejected before any Pydantic work
+        hard_fail = OutputGuardrails._hard_fail_response(response)
+        if hard_fail is not None:
+            return False, [hard_fail], None
+        
+        response = split_points_breakdown(response)
         errors = []
         
-        # Try to parse as GradingResult
+        # Well-formed responses skip Pydantic (the checks below cover the
+        # cross-field invariants); anything else gets full validation
         try:
-            result = GradingResult(**response)
+            if _is_well_formed(response):
+                result = GradingResult.model_construct(**response)
+            else:
+                result = OutputGuardrails._GRADING_ADAPTER.validate_python(response)
         except ValidationError as e:
             errors.append(f"Pydantic validation failed: {str(e)}")
             return False, errors, None
@@ -109,6 +348,66 @@ class OutputGuardrails:
             errors.append(f"Failed to parse response: {str(e)}")
             return False, errors, None
         
+        OutputGuardrails._check_invariants(result, question_number, errors)
+        return len(errors) == 0, errors, result
+    
+    @staticmethod
+    def validate_llm_response_bytes(
+        raw: bytes,
+        question_number: int
+    ) -> Tuple[bool, List[str], Optional[GradingResult]]:
+        """
+        Validate raw LLM grading output (JSON bytes) without an intermediate dict.
+        
+        With msgspec installed, the JSON is decoded and type-checked in one
+        step. Output that needs coercion (e.g. a dict-valued answer) falls
+        back to the dict-based validate_llm_response.
+        
+        Args:
+            raw: LLM's JSON response as bytes (or str)
+            question_number: Expected question number
+            
+        Returns:
+            Tuple of (is_valid, error_messages, parsed_result)
+        """
+        if MSGSPEC_AVAILABLE:
+            try:
+                struct = OutputGuardrails._STRUCT_DECODER.decode(raw)
+            except msgspec.ValidationError:
+                pass
+            except msgspec.DecodeError as e:
+                return False, [f"Failed to parse response: {str(e)}"], None
+            else:
+                errors = []
+                result = GradingResult.model_construct(
+                    **split_points_breakdown(msgspec.structs.asdict(struct))
+                )
+                OutputGuardrails._check_invariants(result, question_number, errors)
+                return len(errors) == 0, errors, result
+        
+        try:
+            response = orjson.loads(raw)
+        except orjson.JSONDecodeError as e:
+            return False, [f"Failed to parse response: {str(e)}"], None
+        return OutputGuardrails.validate_llm_response(response, question_number)
+    
+    @staticmethod
+    def _hard_fail_response(response: Any) -> Optional[str]:
+        """Return why a response can never be a valid grade, or None if it might be."""
+        if not isinstance(response, dict):
+            return f"Failed to parse response: expected a JSON object, got {type(response).__name__}"
+        missing = [field for field in _HARD_REQUIRED_FIELDS if field not in response]
+        if 'points_breakdown' not in response and any(field not in response for _, field in BREAKDOWN_FIELDS):
+            missing.append('points_breakdown')
+        if missing:
+            return f"Response is missing required fields: {', '.join(missing)}"
+        if not isinstance(response['feedback'], str):
+            return "Response feedback must be a string"
+        return None
+    
+    @staticmethod
+    def _check_invariants(result: GradingResult, question_number: int, errors: List[str]) -> None:
+        """Append cross-field invariant violations of a parsed result to errors."""
         # Verify question number matches
         if result.question_number != question_number:
             errors.append(
@@ -124,7 +423,7 @@ class OutputGuardrails:
             )
         
         # Verify breakdown sums correctly
-        breakdown_sum = sum(result.points_breakdown.values())
+        breakdown_sum = result.breakdown_sum()
         if abs(breakdown_sum - result.points_earned) > 0.01:
             errors.append(
                 f"Points breakdown ({breakdown_sum}) doesn't match "
@@ -132,34 +431,31 @@ class OutputGuardrails:
             )
         
         # Check feedback quality
-        if len(result.feedback) < 20:
-            errors.append(f"Feedback too short ({len(result.feedback)} chars, min 20)")
+        feedback_len = len(result.feedback)
+        if feedback_len < 20:
+            errors.append(f"Feedback too short ({feedback_len} chars, min 20)")
         
         # Check for placeholder/template text
-        placeholder_indicators = [
-            "[insert",
-            "TODO",
-            "FIXME",
-            "xxx",
-            "...",
-        ]
-        for indicator in placeholder_indicators:
-            if indicator.lower() in result.feedback.lower():
-                errors.append(f"Feedback contains placeholder text: {indicator}")
-        
-        return len(errors) == 0, errors, result
+        for indicator in OutputGuardrails._PLACEHOLDER_SCANNER.matches(result.feedback):
+            errors.append(f"Feedback contains placeholder text: {indicator}")
     
     @staticmethod
-    def check_consistency(result: GradingResult) -> Tuple[bool, List[str]]:
+    def check_consistency(
+        result: GradingResult,
+        view: Optional[_GradingView] = None
+    ) -> Tuple[bool, List[str]]:
         """
         Check internal consistency of grading result.
         
         Args:
             result: Parsed grading result
+            view: Precomputed derived values (computed here if omitted)
             
         Returns:
             Tuple of (is_consistent, warning_messages)
         """
+        if view is None:
+            view = _GradingView.of(result)
         warnings = []
         
         # If marked correct, points should be high
@@ -170,7 +466,7 @@ class OutputGuardrails:
             )
         
         # If marked incorrect, should have errors listed
-        if not result.is_correct and len(result.specific_errors) == 0:
+        if not result.is_correct and view.n_specific_errors == 0:
             warnings.append(
                 "Marked as incorrect but no specific_errors provided"
             )
@@ -183,7 +479,7 @@ class OutputGuardrails:
         
         # If points earned is 0, breakdown should all be 0
         if result.points_earned == 0:
-            if any(v > 0 for v in result.points_breakdown.values()):
+            if view.breakdown_has_points:
                 warnings.append(
                     "Points earned is 0 but breakdown has non-zero values"
                 )
@@ -195,21 +491,27 @@ class BusinessRulesGuardrails:
     """Enforce business rules and policies."""
     
     @staticmethod
-    def enforce_grading_policies(result: GradingResult) -> Tuple[bool, List[str]]:
+    def enforce_grading_policies(
+        result: GradingResult,
+        view: Optional[_GradingView] = None
+    ) -> Tuple[bool, List[str]]:
         """
         Enforce grading policies.
         
         Args:
             result: Grading result to check
+            view: Precomputed derived values (computed here if omitted)
             
         Returns:
             Tuple of (compliant, policy_violations)
         """
+        if view is None:
+            view = _GradingView.of(result)
         violations = []
         
         # Policy 1: Partial credit must be awarded if methodology is correct
         if result.error_type == "wrong_calculation":
-            if result.points_breakdown.get("showing_work", 0) == 0:
+            if result.showing_work_pts == 0:
                 violations.append(
                     "Policy violation: Wrong calculation with no partial credit "
                     "for methodology"
@@ -217,22 +519,22 @@ class BusinessRulesGuardrails:
         
         # Policy 2: Minimum feedback length
         if result.points_earned < result.points_possible:
-            if len(result.feedback) < 50:
+            if view.feedback_len < 50:
                 violations.append(
                     f"Policy violation: Incorrect answer requires detailed feedback "
-                    f"(min 50 chars, got {len(result.feedback)})"
+                    f"(min 50 chars, got {view.feedback_len})"
                 )
         
         # Policy 3: Must reference data when available
-        if result.error_type in ["wrong_calculation", "missing_data"]:
-            if len(result.data_references) == 0:
+        if result.error_type in _DATA_ERROR_TYPES:
+            if view.n_data_references == 0:
                 violations.append(
                     "Policy violation: Data-related error must include data_references"
                 )
         
         # Policy 4: Zero points requires justification
         if result.points_earned == 0:
-            if len(result.specific_errors) < 2:
+            if view.n_specific_errors < 2:
                 violations.append(
                     "Policy violation: Zero points requires at least 2 specific errors"
                 )
@@ -253,9 +555,10 @@ class BusinessRulesGuardrails:
         if len(results) == 0:
             return True, "No results to check"
         
-        avg_score = sum(r.points_earned for r in results) / len(results)
-        perfect_scores = sum(1 for r in results if r.points_earned == r.points_possible)
-        perfect_rate = perfect_scores / len(results)
+        earned = np.fromiter((r.points_earned for r in results), dtype=np.float64, count=len(results))
+        possible = np.fromiter((r.points_possible for r in results), dtype=np.float64, count=len(results))
+        avg_score = float(earned.mean())
+        perfect_rate = float((earned == possible).mean())
         
         # Warning if average is suspiciously high
         if avg_score > 9.5 and len(results) > 3:
@@ -288,18 +591,17 @@ class ErrorHandlingGuardrails:
         Returns:
             Fallback GradingResult for manual review
         """
-        return GradingResult(
+        # Built from trusted values, so skip validation
+        if isinstance(student_answer, dict):
+            student_answer = student_answer.get('value', str(student_answer))
+        return GradingResult.model_construct(
             question_number=question_number,
             points_earned=0.0,
             points_possible=10,
             is_correct=False,
             student_answer=student_answer,
             correct_answer="[REQUIRES MANUAL REVIEW]",
-            points_breakdown={
-                "correct_answer": 0,
-                "showing_work": 0,
-                "interpretation": 0
-            },
+            **_FALLBACK_BREAKDOWN,
             error_type="incomplete_work",
             specific_errors=[
                 "Automated grading failed",
@@ -307,14 +609,7 @@ class ErrorHandlingGuardrails:
                 "This submission requires manual review"
             ],
             what_was_correct=[],
-            feedback=f"""This submission could not be automatically graded due to a system error.
-
-Error details: {error_message}
-
-This answer has been flagged for manual review by an instructor. You will receive 
-your grade and feedback within 24 hours.
-
-If you believe this is an error, please contact your instructor.""",
+            feedback=_FALLBACK_FEEDBACK_TMPL.format(err=error_message),
             data_references=["[MANUAL REVIEW REQUIRED]"]
         )
     
@@ -336,7 +631,7 @@ If you believe this is an error, please contact your instructor.""",
             Whether to retry
         """
         # Don't retry validation errors (bad student input)
-        if error_type in ["validation_error", "invalid_input"]:
+        if error_type in _NONRETRYABLE_ERRORS:
             return False
         
         # Don't retry if we've hit max attempts
@@ -344,19 +639,15 @@ If you believe this is an error, please contact your instructor.""",
             return False
         
         # Retry for LLM errors, network errors, etc.
-        return error_type in [
-            "llm_error",
-            "network_error",
-            "timeout_error",
-            "rate_limit_error"
-        ]
+        return error_type in _RETRYABLE_ERRORS
 
 
 class RateLimitGuardrails:
     """Prevent abuse through rate limiting."""
     
     def __init__(self):
-        self.submission_history: Dict[str, List[datetime]] = {}
+        # Monotonic timestamps of each student's submissions, oldest first
+        self.submission_history: Dict[str, Deque[float]] = {}
     
     def check_rate_limit(
         self,
@@ -371,29 +662,24 @@ class RateLimitGuardrails:
             max_submissions_per_hour: Maximum submissions allowed per hour
             
         Returns:
-            Tuple of (allowed, message)
+            Tuple of (allowed, message); the message is empty when allowed
         """
-        now = datetime.now()
-        hour_ago = datetime.now().timestamp() - 3600
+        now = time.monotonic()
+        hour_ago = now - 3600.0
         
-        # Get recent submissions for this student
-        if student_id not in self.submission_history:
-            self.submission_history[student_id] = []
-        
-        # Filter to submissions in last hour
-        recent = [
-            ts for ts in self.submission_history[student_id]
-            if ts.timestamp() > hour_ago
-        ]
+        # Drop submissions older than an hour (history is in time order)
+        recent = self.submission_history.setdefault(student_id, deque())
+        while recent and recent[0] <= hour_ago:
+            recent.popleft()
         
         # Check limit
         if len(recent) >= max_submissions_per_hour:
             return False, f"Rate limit exceeded: {len(recent)} submissions in last hour (max {max_submissions_per_hour})"
         
         # Record this submission
-        self.submission_history[student_id].append(now)
+        recent.append(now)
         
-        return True, f"Rate limit OK: {len(recent)+1}/{max_submissions_per_hour} submissions this hour"
+        return True, ""
 
 
 class GradingGuardrails:
@@ -425,25 +711,23 @@ class GradingGuardrails:
         """
         messages = []
         
+        # Read and check the submission once; later steps reuse these values
+        valid_input, input_errors, parsed = self.input_guards.validate_student_submission(submission)
+        
         # Step 1: Rate limiting (if student_id provided)
         if student_id:
             allowed, msg = self.rate_limiter.check_rate_limit(student_id)
             if not allowed:
                 messages.append(f"❌ {msg}")
                 return False, self.error_handler.create_fallback_result(
-                    submission.get('question_number', 0),
-                    str(submission.get('student_answer', '')),
-                    "Rate limit exceeded"
+                    parsed.qnum, parsed.answer, "Rate limit exceeded"
                 ), messages
         
         # Step 2: Input validation
-        valid_input, input_errors = self.input_guards.validate_student_submission(submission)
         if not valid_input:
             messages.extend([f"❌ Input: {err}" for err in input_errors])
             return False, self.error_handler.create_fallback_result(
-                submission.get('question_number', 0),
-                str(submission.get('student_answer', '')),
-                f"Invalid submission: {input_errors[0]}"
+                parsed.qnum, parsed.answer, f"Invalid submission: {input_errors[0]}"
             ), messages
         
         messages.append("✅ Input validation passed")
@@ -451,26 +735,27 @@ class GradingGuardrails:
         # Step 3: Output validation
         valid_output, output_errors, result = self.output_guards.validate_llm_response(
             llm_response,
-            submission['question_number']
+            parsed.qnum
         )
         
         if not valid_output or result is None:
             messages.extend([f"❌ Output: {err}" for err in output_errors])
             return False, self.error_handler.create_fallback_result(
-                submission['question_number'],
-                submission['student_answer'],
-                f"Invalid LLM response: {output_errors[0]}"
+                parsed.qnum, parsed.answer, f"Invalid LLM response: {output_errors[0]}"
             ), messages
         
         messages.append("✅ Output validation passed")
         
+        # Derived values shared by the consistency and policy checks
+        view = _GradingView.of(result)
+        
         # Step 4: Consistency checks
-        consistent, consistency_warnings = self.output_guards.check_consistency(result)
+        consistent, consistency_warnings = self.output_guards.check_consistency(result, view)
         if not consistent:
             messages.extend([f"⚠️  Consistency: {warn}" for warn in consistency_warnings])
         
         # Step 5: Business rules
-        compliant, violations = self.business_rules.enforce_grading_policies(result)
+        compliant, violations = self.business_rules.enforce_grading_policies(result, view)
         if not compliant:
             messages.extend([f"⚠️  Policy: {viol}" for viol in violations])
         
@@ -480,6 +765,11 @@ class GradingGuardrails:
         return True, result, messages
 
 
+# Shared instance: guardrails are stateless apart from rate-limit history,
+# which should be tracked across all crews anyway
+_DEFAULT = GradingGuardrails()
+
+
 if __name__ == "__main__":
     # Test guardrails
     print("Testing Guardrails\n" + "="*70 + "\n")
@@ -490,13 +780,13 @@ if __name__ == "__main__":
         "question_number": 1,
         "student_answer": "$6,500"
     }
-    valid, errors = InputGuardrails.validate_student_submission(submission)
+    valid, errors, _ = InputGuardrails.validate_student_submission(submission)
     print(f"   Valid: {valid}, Errors: {errors}")
     
     # Test 2: Invalid input
     print("\n2. Invalid Input (missing answer):")
     bad_submission = {"question_number": 1}
-    valid, errors = InputGuardrails.validate_student_submission(bad_submission)
+    valid, errors, _ = InputGuardrails.validate_student_submission(bad_submission)
     print(f"   Valid: {valid}, Errors: {errors}")
     
     # Test 3: Output validation
@@ -6,10 +6,12 @@ Command-line interface for grading student submissions.
 """
 
 import argparse
-import json
+import orjson
 import sys
 import os
+from functools import lru_cache
 from pathlib import Path
+from typing import Tuple
 from datetime import datetime
 from crew import GradingCrew
 from schemas import GradingResult
@@ -22,25 +24,39 @@ except ImportError:
     pass  # python-dotenv not installed, will use system env vars
 
 
+@lru_cache(maxsize=8)
+def _load_test_questions_cached(test_file: str, mtime: float) -> Tuple[dict, dict, dict]:
+    """Parse a test file and index it by question number (cached per file version)."""
+    with open(test_file, 'rb') as f:
+        test_data = orjson.loads(f.read())
+    q_to_dataset = {
+        q['question_number']: section['dataset']
+        for section in test_data['sections'] for q in section['questions']
+    }
+    q_to_text = {
+        q['question_number']: q['question']
+        for section in test_data['sections'] for q in section['questions']
+    }
+    return test_data, q_to_dataset, q_to_text
+
+
 def load_test_questions(test_file: str = "data/test.json") -> dict:
     """Load test questions from JSON file."""
-    with open(test_file, 'r') as f:
-        return json.load(f)
+    return _load_test_questions_cached(test_file, os.path.getmtime(test_file))[0]
 
 
-def load_student_submission(submission_file: str) -> dict:
-    """Load student submission from JSON file."""
-    with open(submission_file, 'r') as f:
-        return json.load(f)
+def load_question_index(test_file: str = "data/test.json") -> Tuple[dict, dict]:
+    """Map question numbers to their dataset file and question text."""
+    _, q_to_dataset, q_to_text = _load_test_questions_cached(
+        test_file, os.path.getmtime(test_file)
+    )
+    return q_to_dataset, q_to_text
 
 
-def map_question_to_dataset(question_number: int, test_data: dict) -> str:
-    """Map question number to its dataset file."""
-    for section in test_data['sections']:
-        for question in section['questions']:
-            if question['question_number'] == question_number:
-                return section['dataset']
-    return "unknown.csv"
+def load_student_submission(submission_file: str) -> dict:
+    """Load student submission from JSON file."""
+    with open(submission_file, 'rb') as f:
+        return orjson.loads(f.read())
 
 
 def grade_submission(
@@ -50,7 +66,9 @@ def grade_submission(
     output_file: str = None,
     verbose: bool = True,
     student_id: str = None,
-    limit: int = None
+    limit: int = None,
+    batch: bool = False,
+    max_workers: int = 8
 ):
     """
     Grade a student submission.
@@ -63,6 +81,8 @@ def grade_submission(
         verbose: Whether to print detailed logs
         student_id: Optional student ID
         limit: Optional limit on number of questions to grade
+        batch: Whether to grade through the OpenAI Batch API (cheaper, slower)
+        max_workers: Maximum number of questions graded concurrently (interactive mode)
     """
     
     print("="*70)
@@ -73,6 +93,7 @@ def grade_submission(
     print(f"  Temperature: {temperature}")
     print(f"  Submission: {submission_file}")
     print(f"  Output: {output_file or 'stdout'}")
+    print(f"  Mode: {'batch (OpenAI Batch API)' if batch else f'interactive ({max_workers} concurrent)'}")
     print()
     
     # Load data
@@ -107,25 +128,18 @@ def grade_submission(
     )
     print("✅ Crew initialized\n")
     
+    # Questions indexed once per test file version, so each answer is an O(1) lookup
+    q_to_dataset, q_to_text = load_question_index()
+    
     # Prepare submissions
     submissions = []
     for answer in answers:
         question_number = answer['question_number']
-        dataset_file = map_question_to_dataset(question_number, test_data)
-        
-        # Find full question text
-        question_text = ""
-        for section in test_data['sections']:
-            for q in section['questions']:
-                if q['question_number'] == question_number:
-                    question_text = q['question']
-                    break
-        
         submissions.append({
             'question_number': question_number,
-            'question_text': question_text,
+            'question_text': q_to_text.get(question_number, ""),
             'student_answer': answer['student_answer'],
-            'dataset_file': dataset_file
+            'dataset_file': q_to_dataset.get(question_number, "unknown.csv")
         })
     
     # Apply limit if specified
@@ -135,10 +149,17 @@ def grade_submission(
     
     # Grade all questions
     print("Starting grading process...\n")
-    results, messages = crew_manager.grade_multiple_questions(
-        submissions=submissions,
-        student_id=student_id or student_name
-    )
+    if batch:
+        results, messages = crew_manager.grade_multiple_questions_batch(
+            submissions=submissions,
+            student_id=student_id or student_name
+        )
+    else:
+        results, messages = crew_manager.grade_multiple_questions(
+            submissions=submissions,
+            student_id=student_id or student_name,
+            max_workers=max_workers
+        )
     
     # Create exam report
     print("\n" + "="*70)
@@ -167,8 +188,8 @@ def grade_submission(
     # Save results
     if output_file:
         print(f"\nSaving results to {output_file}...")
-        with open(output_file, 'w') as f:
-            json.dump(report, f, indent=2)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
         print("✅ Results saved")
     
     # Print individual question results
@@ -279,6 +300,19 @@ Examples:
         help='Limit number of questions to grade (e.g., --limit 2 for first 2 questions)'
     )
     
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='Grade through the OpenAI Batch API (50%% cheaper, results within 24h)'
+    )
+    
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=8,
+        help='Maximum number of questions graded concurrently (default: 8)'
+    )
+    
     args = parser.parse_args()
     
     # Validate submission file exists
@@ -295,7 +329,9 @@ Examples:
             output_file=args.output,
             verbose=args.verbose and not args.quiet,
             student_id=args.student_id,
-            limit=args.limit
+            limit=args.limit,
+            batch=args.batch,
+            max_workers=args.max_workers
         )
     except KeyboardInterrupt:
         print("\n\n⚠️  Grading interrupted by user")
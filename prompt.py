@@ -1,3 +1,9 @@
+import functools
+import orjson
+import string
+from types import MappingProxyType
+
+
 
 SYSTEM_PROMPT = """You are an expert Data Science instructor and grader with 10+ years of experience evaluating student work.
 
@@ -61,33 +67,71 @@ You MUST return your grading result as a JSON object with the following structur
     "specific_errors": [str],  // List of specific mistakes found
     "what_was_correct": [str], // List of things student did correctly
     "feedback": str,           // Detailed feedback (minimum 50 characters)
-    "data_references": [str]   // Specific data points checked (e.g., "ecommerce_sales.csv rows 20-30")
+    "data_references": [str],  // Specific data points checked (e.g., "ecommerce_sales.csv rows 20-30")
+    "confidence": float        // 0-1, how certain you are of this grade (use < 0.7 when unsure)
 }"""
 
 
-USER_PROMPT_TEMPLATE = """Grade the following student submission for Question {question_number}.
+# Static instructions come first and per-submission fields last, so every
+# grading call shares the longest possible prefix (provider prompt caching
+# only matches contiguous static prefixes). Keep the student answer at the end.
+USER_PROMPT_TEMPLATE = """Grade the student submission below.
+
+INSTRUCTIONS:
+1. Access the grading rubric for the question
+2. Access the ground truth answer for the question
+3. Access the dataset listed below
+4. Verify the student's answer against the actual data
+5. Determine the points earned (out of the maximum points listed below)
+6. Provide detailed feedback
+
+Think through this step-by-step following your Chain-of-Thought process.
+
+Then, return your grading result as a valid JSON object matching the OUTPUT FORMAT specified in your system instructions.
+
+QUESTION NUMBER: {question_number}
+DATASET: {dataset_file}
+MAXIMUM POINTS: {max_points}
 
 QUESTION:
 {question_text}
 
 STUDENT'S ANSWER:
-{student_answer}
+{student_answer}"""
 
-INSTRUCTIONS:
-1. Access the grading rubric for Question {question_number}
-2. Access the ground truth answer for Question {question_number}
-3. Access the relevant dataset: {dataset_file}
-4. Verify the student's answer against the actual data
-5. Determine the points earned (out of {max_points})
-6. Provide detailed feedback
 
-Think through this step-by-step following your Chain-of-Thought process.
+def _compile_template(template: str, name: str, params: str):
+    """
+    Turn a str.format template into a plain function with positional args.
+    
+    The template is parsed once here; calls just join the literal chunks
+    with the formatted fields instead of re-parsing the format string.
+    """
+    chunks = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if literal:
+            chunks.append(repr(literal))
+        if field is not None:
+            if conversion:
+                raise ValueError(f"Unsupported conversion in template field {field!r}")
+            chunks.append(f"format({field}, {spec!r})")
+    namespace = {}
+    exec(f"def {name}({params}):\n    return ''.join(({', '.join(chunks)},))", namespace)
+    return namespace[name]
+
 
-Then, return your grading result as a valid JSON object matching the OUTPUT FORMAT specified in your system instructions."""
+# Same output as USER_PROMPT_TEMPLATE.format(...), without the per-call parse
+format_user_prompt = _compile_template(
+    USER_PROMPT_TEMPLATE,
+    "format_user_prompt",
+    "question_number, question_text, student_answer, dataset_file, max_points=10"
+)
 
 
-FEW_SHOT_EXAMPLES = [
-    {
+# Read-only (tuple of mapping proxies): get_prompts_with_examples caches
+# the text built from these examples
+FEW_SHOT_EXAMPLES = (
+    MappingProxyType({
         "question_number": 1,
         "question": "What is the total revenue from the Electronics category in Q4 2024?",
         "student_answer": "The total revenue is $6,500.",
@@ -139,8 +183,8 @@ g) Points:
                 ]
             }
         }
-    },
-    {
+    }),
+    MappingProxyType({
         "question_number": 8,
         "question": "Calculate the conversion rate for Control Group (Group A) and Treatment Group (Group B). Which group performed better and by how much?",
         "student_answer": {
@@ -200,8 +244,8 @@ g) Points:
                 ]
             }
         }
-    }
-]
+    })
+)
 
 
 def get_grading_prompt(question_number, question_text, student_answer, dataset_file, max_points=10):
@@ -218,39 +262,36 @@ def get_grading_prompt(question_number, question_text, student_answer, dataset_f
     Returns:
         tuple: (system_prompt, user_prompt)
     """
-    user_prompt = USER_PROMPT_TEMPLATE.format(
-        question_number=question_number,
-        question_text=question_text,
-        student_answer=student_answer,
-        dataset_file=dataset_file,
-        max_points=max_points
+    user_prompt = format_user_prompt(
+        question_number, question_text, student_answer, dataset_file, max_points
     )
     
     return SYSTEM_PROMPT, user_prompt
 
 
+@functools.cache
 def get_prompts_with_examples():
     """
     Get the system prompt with few-shot examples included.
     Useful for models that benefit from seeing examples.
     
+    The examples are constant, so the text is built once and reused.
+    
     Returns:
         str: Enhanced system prompt with examples
     """
-    examples_text = "\n\nFEW-SHOT EXAMPLES:\n\nHere are examples of how to grade correctly:\n\n"
+    parts = [SYSTEM_PROMPT, "\n\nFEW-SHOT EXAMPLES:\n\nHere are examples of how to grade correctly:\n\n"]
     
     for idx, example in enumerate(FEW_SHOT_EXAMPLES, 1):
-        examples_text += f"EXAMPLE {idx}:\n"
-        examples_text += f"Question {example['question_number']}: {example['question']}\n"
-        examples_text += f"Student Answer: {example['student_answer']}\n\n"
-        examples_text += f"Your Thinking Process:\n{example['correct_grading']['thought_process']}\n"
-        examples_text += f"\nYour JSON Output:\n"
-        
-        import json
-        examples_text += json.dumps(example['correct_grading']['json_output'], indent=2)
-        examples_text += "\n\n" + "="*70 + "\n\n"
+        parts.append(f"EXAMPLE {idx}:\n")
+        parts.append(f"Question {example['question_number']}: {example['question']}\n")
+        parts.append(f"Student Answer: {example['student_answer']}\n\n")
+        parts.append(f"Your Thinking Process:\n{example['correct_grading']['thought_process']}\n")
+        parts.append(f"\nYour JSON Output:\n")
+        parts.append(orjson.dumps(example['correct_grading']['json_output'], option=orjson.OPT_INDENT_2).decode())
+        parts.append("\n\n" + "="*70 + "\n\n")
     
-    return SYSTEM_PROMPT + examples_text
+    return "".join(parts)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,16 @@
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Literal
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, ValidationInfo, computed_field, field_validator, model_validator
+from typing import Any, Dict, List, Optional, Literal
 from enum import Enum
+import bisect
+import math
+import numpy as np
+
+# Optional: JIT-compiled batch checks
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 
 class QuestionType(str, Enum):
@@ -11,12 +21,50 @@ class QuestionType(str, Enum):
     STATISTICAL = "statistical"
 
 
+# Criteria of a points breakdown, with the GradingResult field storing each
+BREAKDOWN_FIELDS = (
+    ("correct_answer", "correct_answer_pts"),
+    ("showing_work", "showing_work_pts"),
+    ("interpretation", "interpretation_pts"),
+)
+
+
+def split_points_breakdown(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Move a points_breakdown dict (the layout the LLM produces) into the
+    per-criterion GradingResult fields.
+    
+    Fields already present win over the dict and missing criteria count as
+    0; data without a breakdown dict is returned unchanged.
+    """
+    breakdown = data.get('points_breakdown')
+    if not isinstance(breakdown, dict):
+        return data
+    data = {key: value for key, value in data.items() if key != 'points_breakdown'}
+    for criterion, field in BREAKDOWN_FIELDS:
+        data.setdefault(field, breakdown.get(criterion, 0))
+    return data
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _first_breakdown_mismatch(correct, work, interp, earned):
+        for i in range(earned.size):
+            if abs(correct[i] + work[i] + interp[i] - earned[i]) > 0.01:
+                return i
+        return -1
+
+
 class GradingResult(BaseModel):
     """
     Structured output for a single question's grading result.
     
     This replaces free-form text with a validated structure.
     """
+    # The schema shown to the LLM (e.g. by CrewAI's output_json) describes the
+    # points_breakdown dict it is prompted to produce, not the split fields
+    model_config = ConfigDict(json_schema_mode_override='serialization')
+    
     question_number: int = Field(..., ge=1, le=10, description="Question number (1-10)")
     
     points_earned: float = Field(..., ge=0, le=10, description="Points earned out of 10")
@@ -27,11 +75,11 @@ class GradingResult(BaseModel):
     student_answer: str = Field(..., description="The student's submitted answer")
     correct_answer: str = Field(..., description="The correct answer")
     
-    # Breakdown by grading criteria
-    points_breakdown: dict = Field(
-        ..., 
-        description="Points breakdown: correct_answer, showing_work, interpretation"
-    )
+    # Breakdown by grading criteria. Input and output use the points_breakdown
+    # dict (see split_points_breakdown and the computed field below)
+    correct_answer_pts: float = Field(..., exclude=True, description="Points for the correct answer (0-6)")
+    showing_work_pts: float = Field(..., exclude=True, description="Points for showing work (0-2)")
+    interpretation_pts: float = Field(..., exclude=True, description="Points for interpretation (0-2)")
     
     # Detailed analysis
     error_type: Optional[Literal[
@@ -59,7 +107,27 @@ class GradingResult(BaseModel):
         description="Specific data points referenced (e.g., 'ecommerce_sales.csv rows 5-10')"
     )
     
-    @validator('student_answer', pre=True)
+    confidence: float = Field(
+        default=1.0,
+        ge=0,
+        le=1,
+        description="Grader's confidence in this grade (0-1); low values trigger escalation"
+    )
+    
+    # JSON-ready dump, computed on first use and dropped whenever a field is
+    # assigned or the result is copied (see __setattr__ and model_copy)
+    _json_dump: Optional[dict] = PrivateAttr(default=None)
+    
+    @model_validator(mode='before')
+    @classmethod
+    def parse_points_breakdown(cls, data):
+        """Accept the breakdown as a points_breakdown dict"""
+        if isinstance(data, dict):
+            return split_points_breakdown(data)
+        return data
+    
+    @field_validator('student_answer', mode='before')
+    @classmethod
     def parse_student_answer(cls, v):
         """Handle case where LLM returns dict instead of string"""
         if isinstance(v, dict):
@@ -67,7 +135,8 @@ class GradingResult(BaseModel):
             return v.get('value', str(v))
         return v
     
-    @validator('correct_answer', pre=True)
+    @field_validator('correct_answer', mode='before')
+    @classmethod
     def parse_correct_answer(cls, v):
         """Handle case where LLM returns dict instead of string"""
         if isinstance(v, dict):
@@ -75,21 +144,53 @@ class GradingResult(BaseModel):
             return v.get('value', str(v))
         return v
     
-    @validator('points_earned')
-    def validate_points(cls, v, values):
+    @field_validator('points_earned')
+    @classmethod
+    def validate_points(cls, v, info: ValidationInfo):
         """Ensure points don't exceed maximum"""
-        if v > values.get('points_possible', 10):
+        if v > info.data.get('points_possible', 10):
             raise ValueError('Points earned cannot exceed points possible')
         return v
     
-    @validator('points_breakdown')
-    def validate_breakdown(cls, v, values):
+    @model_validator(mode='after')
+    def validate_breakdown(self):
         """Ensure breakdown sums correctly"""
-        total = sum(v.values())
-        expected = values.get('points_earned', 0)
-        if abs(total - expected) > 0.01:  # Allow small floating point differences
-            raise ValueError(f'Points breakdown ({total}) must sum to points_earned ({expected})')
-        return v
+        total = self.breakdown_sum()
+        if abs(total - self.points_earned) > 0.01:  # Allow small floating point differences
+            raise ValueError(f'Points breakdown ({total}) must sum to points_earned ({self.points_earned})')
+        return self
+    
+    @computed_field
+    @property
+    def points_breakdown(self) -> Dict[str, float]:
+        """Points per criterion: correct_answer, showing_work, interpretation"""
+        return {
+            "correct_answer": self.correct_answer_pts,
+            "showing_work": self.showing_work_pts,
+            "interpretation": self.interpretation_pts,
+        }
+    
+    def breakdown_sum(self) -> float:
+        """Total of the points breakdown"""
+        return self.correct_answer_pts + self.showing_work_pts + self.interpretation_pts
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Assign a field, discarding the cached dump it would make stale"""
+        super().__setattr__(name, value)
+        if name != '_json_dump':
+            self._json_dump = None
+    
+    def model_copy(self, *, update: Optional[Dict[str, Any]] = None, deep: bool = False) -> "GradingResult":
+        """Copy the result; the copy builds its own dump (update may change fields)"""
+        copy = super().model_copy(update=update, deep=deep)
+        copy._json_dump = None
+        return copy
+    
+    def cached_dump(self) -> dict:
+        """Get the JSON-ready dict of this result, computed once and reused"""
+        if self._json_dump is None:
+            self._json_dump = self.model_dump(mode="json")
+        return self._json_dump
     
     def get_percentage(self) -> float:
         """Calculate percentage score"""
@@ -104,9 +205,9 @@ Student Answer: {self.student_answer}
 Correct Answer: {self.correct_answer}
 
 Points Breakdown:
-  - Correct Answer: {self.points_breakdown.get('correct_answer', 0)}/6
-  - Showing Work: {self.points_breakdown.get('showing_work', 0)}/2
-  - Interpretation: {self.points_breakdown.get('interpretation', 0)}/2
+  - Correct Answer: {self.correct_answer_pts}/6
+  - Showing Work: {self.showing_work_pts}/2
+  - Interpretation: {self.interpretation_pts}/2
 
 {self.feedback}
 """
@@ -122,7 +223,7 @@ class ExamGradingReport(BaseModel):
     
     question_results: List[GradingResult] = Field(
         ..., 
-        min_items=1,
+        min_length=1,
         description="Grading results for each question"
     )
     
@@ -153,24 +254,51 @@ class ExamGradingReport(BaseModel):
     
     grading_timestamp: str = Field(..., description="When grading was completed")
     
-    @validator('total_points_earned')
-    def validate_total_points(cls, v, values):
+    @field_validator('total_points_earned')
+    @classmethod
+    def validate_total_points(cls, v, info: ValidationInfo):
         """Ensure total matches sum of individual questions"""
-        if 'question_results' in values:
-            calculated_total = sum(q.points_earned for q in values['question_results'])
+        if 'question_results' in info.data:
+            calculated_total = sum(q.points_earned for q in info.data['question_results'])
             if abs(calculated_total - v) > 0.01:
                 raise ValueError(f'Total points ({v}) must match sum of question points ({calculated_total})')
         return v
     
-    @validator('letter_grade')
-    def validate_letter_grade(cls, v, values):
+    @field_validator('letter_grade')
+    @classmethod
+    def validate_letter_grade(cls, v, info: ValidationInfo):
         """Ensure letter grade matches percentage"""
-        pct = values.get('overall_percentage', 0)
+        pct = info.data.get('overall_percentage', 0)
         expected = calculate_letter_grade(pct)
         if v != expected:
             raise ValueError(f'Letter grade {v} does not match percentage {pct} (expected {expected})')
         return v
     
+    @classmethod
+    def validate_batch(cls, results: List[GradingResult]) -> int:
+        """
+        Check the breakdown sums of many results in one pass.
+        
+        Args:
+            results: Grading results, e.g. from several students' reports
+            
+        Returns:
+            Index of the first result whose breakdown does not sum to
+            points_earned, or -1 if all are consistent
+        """
+        n = len(results)
+        columns = np.zeros((len(BREAKDOWN_FIELDS) + 1, n))
+        for i, r in enumerate(results):
+            columns[0, i] = r.correct_answer_pts
+            columns[1, i] = r.showing_work_pts
+            columns[2, i] = r.interpretation_pts
+            columns[3, i] = r.points_earned
+        
+        if NUMBA_AVAILABLE:
+            return int(_first_breakdown_mismatch(*columns))
+        mismatches = np.flatnonzero(np.abs(columns[:-1].sum(axis=0) - columns[-1]) > 0.01)
+        return int(mismatches[0]) if mismatches.size else -1
+    
     def get_summary_stats(self) -> dict:
         """Get summary statistics"""
         return {
@@ -182,31 +310,34 @@ class ExamGradingReport(BaseModel):
         }
 
 
+# Letter-grade scale: _LETTER_GRADES[i] applies from _GRADE_THRESHOLDS[i-1] (inclusive) upward
+_GRADE_THRESHOLDS = (60, 70, 73, 77, 80, 83, 87, 90, 93)
+_LETTER_GRADES = ("F", "D", "C-", "C", "C+", "B-", "B", "B+", "A-", "A")
+
+# Array copies of the same scale for calculate_letter_grades
+_GRADE_THRESHOLDS_ARRAY = np.array(_GRADE_THRESHOLDS)
+_LETTER_GRADES_ARRAY = np.array(_LETTER_GRADES)
+
+
+def calculate_letter_grades(percentages: np.ndarray) -> np.ndarray:
+    """
+    Calculate letter grades for many percentages at once.
+    Standard grading scale.
+    """
+    percentages = np.asarray(percentages, dtype=np.float64)
+    indices = np.searchsorted(_GRADE_THRESHOLDS_ARRAY, percentages, side='right')
+    indices[np.isnan(percentages)] = 0  # searchsorted puts NaN after every threshold
+    return _LETTER_GRADES_ARRAY[indices]
+
+
 def calculate_letter_grade(percentage: float) -> str:
     """
     Calculate letter grade from percentage.
     Standard grading scale.
     """
-    if percentage >= 93:
-        return "A"
-    elif percentage >= 90:
-        return "A-"
-    elif percentage >= 87:
-        return "B+"
-    elif percentage >= 83:
-        return "B"
-    elif percentage >= 80:
-        return "B-"
-    elif percentage >= 77:
-        return "C+"
-    elif percentage >= 73:
-        return "C"
-    elif percentage >= 70:
-        return "C-"
-    elif percentage >= 60:
-        return "D"
-    else:
-        return "F"
+    if math.isnan(percentage):
+        return _LETTER_GRADES[0]  # NaN compares above every threshold in bisect
+    return _LETTER_GRADES[bisect.bisect_right(_GRADE_THRESHOLDS, percentage)]
 
 
 # Example usage for type checking and validation
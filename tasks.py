@@ -7,50 +7,128 @@ Defines grading tasks and their expected outputs.
 
 from crewai import Task
 from schemas import GradingResult
-from prompt import USER_PROMPT_TEMPLATE
+from prompt import format_user_prompt
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+import functools
+import os
+import threading
+import tool_functions
 
 
-def create_grading_task(
-    agent,
-    question_number: int,
-    question_text: str,
-    student_answer: str,
-    dataset_file: str,
-    max_points: int = 10
-) -> Task:
+# Deterministic whole-dataset queries, keyed by the dataset they read. A
+# question gets the queries over its own dataset (from the exam's question
+# data), labelled with what they cover: they verify, never replace, the
+# ground truth answer
+_DATASET_QUERIES = {
+    "ecommerce_sales.csv": (
+        ("Electronics orders, all dates", tool_functions.query_electronics_orders),
+        ("Electronics revenue, all dates", tool_functions.calculate_electronics_revenue),
+    ),
+    "customer_data.csv": (
+        ("Customers per age group, all customers", tool_functions.get_customer_age_groups),
+    ),
+    "ab_test_results.csv": (
+        ("Conversions per A/B test group, all users", tool_functions.get_ab_test_conversions),
+    ),
+}
+
+# Tools still offered to the agent: everything except the rubric and ground
+# truth lookups, whose results are already in the task
+_VERIFICATION_TOOLS = [
+    tool_functions.read_dataset,
+    tool_functions.query_electronics_orders,
+    tool_functions.calculate_electronics_revenue,
+    tool_functions.get_customer_age_groups,
+    tool_functions.get_ab_test_conversions,
+]
+
+
+def _file_mtimes(paths) -> Tuple[Optional[int], ...]:
+    """mtime (ns) of each path, None for missing files."""
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+def _precomputed_facts(dataset_file: str, question_number: int) -> str:
     """
-    Create a grading task for a specific question.
+    Resolve the reference material and dataset queries for a question.
+    
+    The result is reused until the rubric, ground truth or dataset file
+    changes on disk.
     
     Args:
-        agent: The grader agent
+        dataset_file: Dataset filename for the question
         question_number: Question number (1-10)
-        question_text: Full text of the question
-        student_answer: Student's submitted answer
-        dataset_file: Dataset file needed for this question
-        max_points: Maximum points for the question
         
     Returns:
-        Configured CrewAI Task
+        Formatted reference sections for the task description
+    """
+    paths = (*tool_functions.REFERENCE_FILES, tool_functions.DATASETS_DIR / dataset_file)
+    return _build_precomputed_facts(dataset_file, question_number, _file_mtimes(paths))
+
+
+@functools.lru_cache(maxsize=64)
+def _build_precomputed_facts(
+    dataset_file: str,
+    question_number: int,
+    mtimes: Tuple[Optional[int], ...]
+) -> str:
     """
+    Build the reference sections for one version of the files.
     
-    # Generate the prompt
-    description = USER_PROMPT_TEMPLATE.format(
-        question_number=question_number,
-        question_text=question_text,
-        student_answer=student_answer,
-        dataset_file=dataset_file,
-        max_points=max_points
+    The rubric, ground truth and whole-dataset queries never change between
+    submissions, so they are embedded in the task instead of costing the
+    agent a tool-call round trip every time. Only the rubric and ground
+    truth are authoritative; the query results are there to check student
+    work against. mtimes only keys the cache (see _precomputed_facts).
+    """
+    rubric = tool_functions.get_grading_rubric.run(question_number=question_number)
+    truth = tool_functions.get_ground_truth_answer.run(question_number=question_number)
+    text = (
+        "GROUND TRUTH (already retrieved from the grading tools - do not call "
+        "tools to fetch it again):\n\n"
+        f"GRADING RUBRIC:\n{rubric}\n\n"
+        f"GROUND TRUTH ANSWER:\n{truth}\n\n"
     )
     
-    # Define expected output structure
-    student_answer_preview = student_answer[:50] if len(student_answer) > 50 else student_answer
-    expected_output = f"""A complete grading result in JSON format with these exact fields:
+    queries = _DATASET_QUERIES.get(dataset_file, ())
+    if queries:
+        results = "\n\n".join(f"{label.upper()}:\n{query.run()}" for label, query in queries)
+        text += (
+            f"DATASET QUERY RESULTS ({dataset_file}, for verification): these cover "
+            "the whole dataset and may not match the question's scope (e.g. a single "
+            "quarter). Where they differ from the ground truth answer, the ground "
+            "truth answer is correct.\n\n" + results + "\n\n"
+        )
+    return text
+
+
+# Markers for the per-task fields in the cached expected-output text
+_QN_SLOT = "\x00question_number\x00"
+_PREVIEW_SLOT = "\x00student_answer_preview\x00"
+
+
+@functools.lru_cache(maxsize=16)
+def _expected_output_parts(max_points: int) -> Tuple[str, str, str]:
+    """
+    Build the expected-output text for a max_points value once.
+    
+    Returns the static text split around the two per-task fields
+    (question number, then student answer preview).
+    """
+    template = f"""A complete grading result in JSON format with these exact fields:
 {{
-    "question_number": {question_number},
+    "question_number": {_QN_SLOT},
     "points_earned": <float between 0 and {max_points}>,
     "points_possible": {max_points},
     "is_correct": <boolean>,
-    "student_answer": "{student_answer_preview}...",
+    "student_answer": "{_PREVIEW_SLOT}...",
     "correct_answer": "<the verified correct answer from ground truth>",
     "points_breakdown": {{
         "correct_answer": <0-6 points>,
@@ -61,16 +139,55 @@ def create_grading_task(
     "specific_errors": ["<list of specific mistakes>"],
     "what_was_correct": ["<list of correct elements>"],
     "feedback": "<detailed feedback with at least 50 characters explaining the grade>",
-    "data_references": ["<specific data points checked, e.g., 'ecommerce_sales.csv rows 1-30'>"]
+    "data_references": ["<specific data points checked, e.g., 'ecommerce_sales.csv rows 1-30'>"],
+    "confidence": <float between 0 and 1, how certain you are of this grade>
 }}
 
 The JSON must be valid and match the GradingResult Pydantic schema exactly.
 """
+    head, rest = template.split(_QN_SLOT)
+    middle, tail = rest.split(_PREVIEW_SLOT)
+    return head, middle, tail
+
+
+def create_grading_task(
+    agent,
+    question_number: int,
+    question_text: str,
+    student_answer: str,
+    dataset_file: str,
+    max_points: int = 10
+) -> Task:
+    """
+    Create a grading task for a specific question.
+    
+    Args:
+        agent: The grader agent
+        question_number: Question number (1-10)
+        question_text: Full text of the question
+        student_answer: Student's submitted answer
+        dataset_file: Dataset file needed for this question
+        max_points: Maximum points for the question
+        
+    Returns:
+        Configured CrewAI Task
+    """
+    
+    # Generate the prompt, with the deterministic tool outputs pre-resolved
+    description = _precomputed_facts(dataset_file, question_number) + format_user_prompt(
+        question_number, question_text, student_answer, dataset_file, max_points
+    )
+    
+    # Define expected output structure
+    student_answer_preview = str(student_answer)[:50]  # also handles structured (dict) answers
+    head, middle, tail = _expected_output_parts(max_points)
+    expected_output = f"{head}{question_number}{middle}{student_answer_preview}{tail}"
     
     task = Task(
         description=description,
         expected_output=expected_output,
         agent=agent,
+        tools=_VERIFICATION_TOOLS,  # Rubric and ground truth are already embedded
         output_json=GradingResult  # Enforce structured output
     )
     
@@ -163,6 +280,42 @@ def create_batch_grading_tasks(
     return tasks
 
 
+def run_batch_grading(
+    submissions: list,
+    agent_factory: Callable[[], Any],
+    max_workers: int = 8
+) -> list:
+    """
+    Grade submissions concurrently.
+    
+    Each grading is dominated by LLM round trips, so running them on a thread
+    pool overlaps the network waits. CrewAI agents keep per-execution state
+    (executor, task, messages) and must not be shared between threads, so
+    agent_factory is called once per worker thread and that worker's tasks
+    are built for its own agent.
+    
+    Args:
+        submissions: Submission dicts, as for create_batch_grading_tasks
+        agent_factory: Zero-argument callable returning a new grader agent,
+            e.g. functools.partial(create_grader_agent, model_name="gpt-4")
+        max_workers: Maximum number of gradings executing at once
+        
+    Returns:
+        List of task outputs, in the same order as submissions
+    """
+    local = threading.local()
+    
+    def grade(submission: dict):
+        agent = getattr(local, "agent", None)
+        if agent is None:
+            agent = local.agent = agent_factory()
+        task = create_batch_grading_tasks(agent, [submission])[0]
+        return task.execute_sync()
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(grade, submissions))
+
+
 if __name__ == "__main__":
     # Test task creation
     from agents import create_grader_agent
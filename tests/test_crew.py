@@ -0,0 +1,166 @@
+"""
+Tests for response caching and deduplication in crew.py
+========================================================
+
+The grading agents are replaced with a stub grader, so these run without an
+LLM: they check which submissions reach the grader and what each gets back.
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import crew
+from cache import make_cache_key, reference_revision
+from schemas import GradingResult
+
+
+ANSWER = "Total Electronics revenue is $6,500 across 12 orders"
+
+
+def _graded(question_number: int, student_answer) -> GradingResult:
+    """What the stub grader returns for every submission."""
+    return GradingResult(
+        question_number=question_number,
+        points_earned=8.0,
+        points_possible=10,
+        is_correct=False,
+        student_answer=student_answer,
+        correct_answer="$7,398.53",
+        points_breakdown={"correct_answer": 4, "showing_work": 2, "interpretation": 2},
+        error_type="wrong_calculation",
+        specific_errors=["Revenue total is off"],
+        what_was_correct=["Filtered to Electronics"],
+        feedback="The filtering is right, but the revenue total does not match the dataset.",
+        data_references=["ecommerce_sales.csv"]
+    )
+
+
+class MakeCacheKeyTest(unittest.TestCase):
+    """Everything that can change a grade is part of the key; answer formatting is not."""
+
+    def setUp(self):
+        self.args = (1, ANSWER, "ecommerce_sales.csv", "gpt-4", "rev1")
+
+    def test_normalized_answers_share_a_key(self):
+        self.assertEqual(
+            make_cache_key(*self.args),
+            make_cache_key(1, f"  {ANSWER.upper()}\n", "ecommerce_sales.csv", "gpt-4", "rev1")
+        )
+
+    def test_key_fields(self):
+        for i, other in enumerate((2, "Total revenue is $7,398.53", "customer_data.csv", "gpt-4o-mini", "rev2")):
+            changed = list(self.args)
+            changed[i] = other
+            with self.subTest(field=i):
+                self.assertNotEqual(make_cache_key(*changed), make_cache_key(*self.args))
+
+    def test_reference_revision_tracks_rubric_edits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rubric = Path(tmp) / "rubric.json"
+            rubric.write_text('{"points": 10}')
+            before = reference_revision([rubric])
+
+            rubric.write_text('{"points": 12}')
+            os.utime(rubric, ns=(0, rubric.stat().st_mtime_ns + 1))
+            self.assertNotEqual(reference_revision([rubric]), before)
+
+
+class GradingCrewTestCase(unittest.TestCase):
+    """GradingCrew with a throwaway cache and a stub grader in place of the agents."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+        for target in (
+            mock.patch.object(crew, "create_grader_agent"),
+            mock.patch.object(crew.GradingCrew, "_build_crew"),
+            mock.patch("builtins.print")
+        ):
+            target.start()
+            self.addCleanup(target.stop)
+
+        self.grading_crew = crew.GradingCrew(
+            verbose=False, cheap_model=None, cache_path=str(self.tmp / "cache.sqlite")
+        )
+        self.grader = mock.patch.object(
+            self.grading_crew, "_run_grader",
+            side_effect=lambda tier, question_number, question_text, student_answer, dataset_file:
+                _graded(question_number, student_answer)
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _grade(self, student_answer):
+        return self.grading_crew.grade_single_question(
+            1, "What is the total Electronics revenue?", student_answer, "ecommerce_sales.csv"
+        )
+
+
+class ResponseCacheTest(GradingCrewTestCase):
+    """Exact-match cache in grade_single_question."""
+
+    def test_cache_hit_keeps_own_answer(self):
+        success, first, _ = self._grade(ANSWER)
+        self.assertTrue(success)
+
+        reworded = f"  {ANSWER.lower()} "
+        success, second, messages = self._grade(reworded)
+        self.assertTrue(success)
+        self.assertEqual(self.grader.call_count, 1)
+        self.assertTrue(messages[0].startswith("⚡ Cache hit"))
+        self.assertEqual(second.student_answer, reworded)
+        self.assertEqual(second.points_breakdown, first.points_breakdown)
+
+    def test_rubric_edit_invalidates_cached_grade(self):
+        rubric = self.tmp / "rubric.json"
+        rubric.write_text('{"points": 10}')
+        with mock.patch.object(crew, "REFERENCE_FILES", (rubric,)):
+            self._grade(ANSWER)
+            rubric.write_text('{"points": 12}')
+            os.utime(rubric, ns=(0, rubric.stat().st_mtime_ns + 1))
+            self._grade(ANSWER)
+        self.assertEqual(self.grader.call_count, 2)
+
+
+class DeduplicationTest(GradingCrewTestCase):
+    """Duplicate submissions in grade_multiple_questions are graded once."""
+
+    def _submission(self, question_number: int, student_answer: str, dataset_file: str = "ecommerce_sales.csv"):
+        return {
+            'question_number': question_number,
+            'question_text': "What is the total Electronics revenue?",
+            'student_answer': student_answer,
+            'dataset_file': dataset_file
+        }
+
+    def test_duplicates_graded_once(self):
+        submissions = [
+            self._submission(1, ANSWER),
+            self._submission(2, ANSWER),
+            self._submission(1, ANSWER.upper()),
+            self._submission(1, ANSWER, "customer_data.csv"),
+            self._submission(1, f"{ANSWER}\n"),
+        ]
+
+        with mock.patch.object(self.grading_crew, "cache", None):
+            results, messages = self.grading_crew.grade_multiple_questions(submissions, max_workers=2)
+
+        self.assertEqual(self.grader.call_count, 3)
+        self.assertFalse([msg for msg in messages if msg.startswith("❌")])
+        self.assertEqual(sum(msg.startswith("⚡ Duplicate") for msg in messages), 2)
+        for submission, result in zip(submissions, results):
+            self.assertEqual(result.question_number, submission['question_number'])
+            self.assertEqual(result.student_answer, submission['student_answer'])
+        # Duplicates get their own copy, not a shared object
+        self.assertIsNot(results[0], results[2])
+        self.assertEqual(results[2].points_breakdown, results[0].points_breakdown)
+
+
+if __name__ == "__main__":
+    unittest.main()
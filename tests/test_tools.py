@@ -0,0 +1,183 @@
+"""
+Tests for the dataset tools in tools.py
+=======================================
+
+Every available CSV engine must type and filter the bundled datasets exactly
+like the C parser, which is what GradingTools used before the pyarrow engine.
+"""
+
+import operator
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+import tools
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DATASETS = ("ecommerce_sales.csv", "customer_data.csv", "ab_test_results.csv")
+ENGINES = ("c", "pyarrow") if tools._PYARROW_AVAILABLE else ("c",)
+
+# query_dataset filters checked against the C-engine baseline
+QUERIES = [
+    ("ecommerce_sales.csv", {'date': {'gte': '2024-12-01'}}),
+    ("ecommerce_sales.csv", {'date': '2024-12-03'}),
+    ("ecommerce_sales.csv", {'date': {'gte': '2024-10-01', 'lte': '2024-12-31'}, 'category': 'Electronics'}),
+    ("ecommerce_sales.csv", {'category': 'Electronics'}),
+    ("ecommerce_sales.csv", {'status': 'completed', 'quantity': {'gt': 1}}),
+    ("ecommerce_sales.csv", {'category': {'lt': 'Electronics'}}),  # stored as a categorical
+    ("ecommerce_sales.csv", {'discount_code': {'gte': 'SAVE'}}),  # has missing values
+    ("customer_data.csv", {'age': {'gte': 18, 'lte': 30}}),
+    ("customer_data.csv", {'join_date': {'lt': '2022-01-01'}}),
+    ("customer_data.csv", {'last_purchase_date': '2024-11-20'}),
+    ("ab_test_results.csv", {'group': 'B', 'converted': 1}),
+]
+
+_BASELINE_OPS = {'gte': operator.ge, 'lte': operator.le, 'gt': operator.gt, 'lt': operator.lt}
+
+
+def _engine(engine: str):
+    """Make GradingTools parse with the given CSV engine (Parquet sidecars only with pyarrow)."""
+    return mock.patch.multiple(tools, _CSV_ENGINE=engine, _PYARROW_AVAILABLE=engine == "pyarrow")
+
+
+def _baseline_count(filename: str, filters: dict) -> int:
+    """Rows matching filters, filtered the way the original query_dataset did."""
+    df = pd.read_csv(DATA_DIR / "datasets" / filename, engine="c")
+    for col, value in filters.items():
+        if isinstance(value, dict):
+            for key, op in _BASELINE_OPS.items():
+                if key in value:
+                    df = df[op(df[col], value[key])]
+        else:
+            df = df[df[col] == value]
+    return len(df)
+
+
+class DatasetCopyTestCase(unittest.TestCase):
+    """Runs against a private copy of the bundled datasets (sidecars land there too)."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.data_dir = Path(tmp.name)
+        shutil.copytree(DATA_DIR / "datasets", self.data_dir / "datasets")
+
+
+class EngineParityTest(DatasetCopyTestCase):
+    """Each CSV engine against the C parser on the bundled datasets."""
+
+    def test_parsed_frames_match_c_engine(self):
+        for engine in ENGINES:
+            for filename in DATASETS:
+                path = self.data_dir / "datasets" / filename
+                with self.subTest(engine=engine, filename=filename), _engine(engine):
+                    pd.testing.assert_frame_equal(tools._read_csv(path), pd.read_csv(path, engine="c"))
+
+    def test_query_counts_match_c_engine(self):
+        for engine in ENGINES:
+            with _engine(engine):
+                grading_tools = tools.GradingTools(str(self.data_dir))
+                for filename, filters in QUERIES:
+                    with self.subTest(engine=engine, filename=filename, filters=filters):
+                        self.assertEqual(
+                            grading_tools.query_dataset(filename, filters=filters, calculate='count'),
+                            f"Count: {_baseline_count(filename, filters)} records"
+                        )
+
+    def test_date_filters(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine), _engine(engine):
+                grading_tools = tools.GradingTools(str(self.data_dir))
+                self.assertEqual(
+                    grading_tools.query_dataset(
+                        'ecommerce_sales.csv', filters={'date': {'gte': '2024-12-01'}}, calculate='count'
+                    ),
+                    "Count: 11 records"
+                )
+                revenue = grading_tools.calculate_revenue(filters={'date': '2024-12-03'}, detail=False)
+                self.assertIn("Number of orders: 1\n", revenue)
+                self.assertIn("Total revenue: $299.98", revenue)
+
+    def test_tool_output_matches_c_engine(self):
+        # Compare with a fresh instance each time so no result comes from the tool cache
+        for engine in ENGINES[1:]:
+            for filename in DATASETS:
+                with self.subTest(engine=engine, filename=filename):
+                    with _engine("c"):
+                        expected = tools.GradingTools(str(self.data_dir)).get_dataset_info(filename)
+                    with _engine(engine):
+                        actual = tools.GradingTools(str(self.data_dir)).get_dataset_info(filename)
+                    self.assertEqual(actual, expected)
+
+
+class RangeFilterTest(DatasetCopyTestCase):
+    """Range bounds are converted to the column's type, or rejected with a clear error."""
+
+    def setUp(self):
+        super().setUp()
+        self.grading_tools = tools.GradingTools(str(self.data_dir))
+
+    def _count(self, filename: str, filters: dict) -> str:
+        return self.grading_tools.query_dataset(filename, filters=filters, calculate='count')
+
+    def test_numeric_string_bound(self):
+        self.assertEqual(
+            self._count("customer_data.csv", {'age': {'gte': '30'}}),
+            self._count("customer_data.csv", {'age': {'gte': 30}})
+        )
+
+    def test_bound_of_wrong_type(self):
+        self.assertEqual(
+            self._count("customer_data.csv", {'age': {'gte': 'thirty'}}),
+            "Error: Range filter 'gte' on numeric column 'age' needs a number, got 'thirty'"
+        )
+        self.assertTrue(
+            self._count("ecommerce_sales.csv", {'date': {'gte': 20241201}})
+            .startswith("Error: Range filter 'gte' on text column 'date' needs a string")
+        )
+
+
+@unittest.skipUnless(tools._PYARROW_AVAILABLE, "Parquet sidecars need pyarrow")
+class ParquetSidecarTest(DatasetCopyTestCase):
+    """Sidecars are only served for the CSV revision and typing they were written from."""
+
+    def test_outdated_sidecar_is_rebuilt(self):
+        csv_path = self.data_dir / "datasets" / "ecommerce_sales.csv"
+        # Written by an older version: dates stored as dates, no source record
+        outdated = pd.read_csv(csv_path, engine="c")
+        outdated['date'] = pd.to_datetime(outdated['date']).dt.date
+        outdated.to_parquet(csv_path.with_suffix(".parquet"), index=False)
+        
+        grading_tools = tools.GradingTools(str(self.data_dir))
+        self.assertEqual(
+            grading_tools.query_dataset('ecommerce_sales.csv', filters={'date': {'gte': '2024-12-01'}}, calculate='count'),
+            "Count: 11 records"
+        )
+        sidecar = pd.read_parquet(csv_path.with_suffix(".parquet"))
+        self.assertEqual(sidecar.attrs.pop("source")["format"], tools._SIDECAR_FORMAT)
+        pd.testing.assert_frame_equal(sidecar, tools._read_csv(csv_path))
+
+    def test_sidecar_tracks_csv_size(self):
+        csv_path = self.data_dir / "datasets" / "ab_test_results.csv"
+        tools.GradingTools(str(self.data_dir)).get_dataset_info("ab_test_results.csv")
+        
+        # Same mtime, different content: only the size gives the edit away
+        stat = csv_path.stat()
+        with open(csv_path, "a") as f:
+            f.write("U9999,B,treatment,1,60\n")
+        os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        
+        self.assertEqual(
+            tools.GradingTools(str(self.data_dir)).query_dataset("ab_test_results.csv", calculate='count'),
+            f"Count: {len(pd.read_csv(csv_path, engine='c'))} records"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
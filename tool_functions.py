@@ -7,25 +7,93 @@ These are standalone functions decorated with @tool from crewai.tools
 
 from crewai.tools import tool
 from tools import GradingTools
-import json
+from functools import lru_cache
+from typing import Tuple
+import orjson
+import os
+import numpy as np
 import pandas as pd
 
+# Optional: multithreaded Arrow CSV parser
+try:
+    import pyarrow  # noqa: F401  (only needed as a pandas read_csv engine)
+    _CSV_ENGINE = "pyarrow"
+except ImportError:
+    _CSV_ENGINE = "c"
+
+# Optional: JIT-compiled kernels for large datasets
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # Initialize global tools instance
 _tools = GradingTools()
 
+# Files whose content determines every grade (see cache.reference_revision)
+REFERENCE_FILES = (_tools.rubric_path, _tools.ground_truth_path)
+DATASETS_DIR = _tools.datasets_dir
+
+# Upper (inclusive) ages of the Young and Middle groups
+_AGE_BOUNDS = np.array([30, 50])
+
+CUSTOMER_DATA_CSV = 'data/datasets/customer_data.csv'
+AB_TEST_CSV = 'data/datasets/ab_test_results.csv'
+
+# Below this many rows the numpy path beats the JIT call overhead
+_NUMBA_MIN_ROWS = 100_000
+
+# Compact dtypes for the columns the aggregate tools read (ignored when absent);
+# age is nullable so customers without an age parse and are skipped
+_CSV_DTYPES = {'age': 'Int16', 'converted': np.int8, 'group': 'category'}
+
+
+@lru_cache(maxsize=32)
+def _load_csv_cached(path: str, mtime: float) -> pd.DataFrame:
+    return pd.read_csv(path, dtype=_CSV_DTYPES, engine=_CSV_ENGINE)
+
+
+def _dumps(obj) -> str:
+    """Pretty-print a JSON-ready object for the LLM (2-space indent)."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+
+def load_csv(path: str) -> pd.DataFrame:
+    """Read a CSV once per file version; the returned frame is shared, do not modify it."""
+    return _load_csv_cached(path, os.path.getmtime(path))
+
+
+def resolve_reference_material(question_number: int, dataset_file: str) -> str:
+    """
+    Render the rubric, ground truth and dataset for a question as prompt text.
+    
+    Used when grading without an agent loop (e.g. batch mode): the data the
+    agent would otherwise fetch through tool calls is embedded in the prompt.
+    """
+    rubric = _dumps(_tools.get_grading_rubric(question_number))
+    truth = _dumps(_tools.get_ground_truth_answer(question_number))
+    dataset = _tools.read_dataset(dataset_file)
+    return (
+        "REFERENCE MATERIAL (already retrieved for you - no tool calls are available):\n\n"
+        f"GRADING RUBRIC:\n{rubric}\n\n"
+        f"GROUND TRUTH ANSWER:\n{truth}\n\n"
+        f"DATASET:\n{dataset}"
+    )
+
 
 @tool("get_grading_rubric")
 def get_grading_rubric(question_number: int) -> str:
     """Get the grading rubric for a specific question. This tool provides point allocation breakdown, partial credit criteria, and common errors to check for."""
     result = _tools.get_grading_rubric(question_number)
-    return json.dumps(result, indent=2)
+    return _dumps(result)
 
 
 @tool("get_ground_truth_answer")
 def get_ground_truth_answer(question_number: int) -> str:
     """Get the correct answer and methodology for a question. This tool provides the correct answer, step-by-step methodology, and detailed calculation breakdown."""
     result = _tools.get_ground_truth_answer(question_number)
-    return json.dumps(result, indent=2)
+    return _dumps(result)
 
 
 @tool("read_dataset")
@@ -50,28 +118,65 @@ def calculate_electronics_revenue() -> str:
     return _tools.calculate_revenue(filters={'category': 'Electronics'})
 
 
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _age_counts_jit(ages):
+        young = middle = senior = 0
+        for age in ages:
+            if age <= 30:
+                young += 1
+            elif age <= 50:
+                middle += 1
+            else:
+                senior += 1
+        return young, middle, senior
+
+
+@lru_cache(maxsize=4)
+def _age_group_counts(path: str, mtime: float) -> Tuple[int, int, int]:
+    df = _load_csv_cached(path, mtime)
+    
+    # One pass over the age column: bucket 0 is <=30, 1 is 31-50, 2 is 51+
+    ages = df['age'].dropna().to_numpy(dtype=np.int64)
+    if NUMBA_AVAILABLE and len(ages) >= _NUMBA_MIN_ROWS:
+        return _age_counts_jit(ages.astype(np.int32))
+    young, middle, senior = np.bincount(np.searchsorted(_AGE_BOUNDS, ages), minlength=3)
+    return int(young), int(middle), int(senior)
+
+
+@lru_cache(maxsize=4)
+def _ab_test_stats(path: str, mtime: float) -> Tuple[int, int, int, int]:
+    df = _load_csv_cached(path, mtime)
+    
+    # One grouped pass instead of two mask-and-copy slices
+    agg = df.groupby('group', sort=False, observed=True)['converted'].agg(['sum', 'size'])
+    return (
+        int(agg.at['A', 'sum']), int(agg.at['A', 'size']),
+        int(agg.at['B', 'sum']), int(agg.at['B', 'size'])
+    )
+
+
+def age_group_counts() -> Tuple[int, int, int]:
+    """(young, middle, senior) customer counts, recomputed only when the CSV changes."""
+    return _age_group_counts(CUSTOMER_DATA_CSV, os.path.getmtime(CUSTOMER_DATA_CSV))
+
+
+def ab_test_stats() -> Tuple[int, int, int, int]:
+    """(control conversions, control size, treatment conversions, treatment size)."""
+    return _ab_test_stats(AB_TEST_CSV, os.path.getmtime(AB_TEST_CSV))
+
+
 @tool("get_customer_age_groups")
 def get_customer_age_groups() -> str:
     """Get customer counts by age group from customer data. Returns segmentation into Young (18-30), Middle (31-50), and Senior (51+) age groups."""
-    df = pd.read_csv('data/datasets/customer_data.csv')
-    
-    young = len(df[df['age'] <= 30])
-    middle = len(df[(df['age'] >= 31) & (df['age'] <= 50)])
-    senior = len(df[df['age'] >= 51])
-    
+    young, middle, senior = age_group_counts()
     return f"Young (18-30): {young} customers\nMiddle (31-50): {middle} customers\nSenior (51+): {senior} customers"
 
 
 @tool("get_ab_test_conversions")
 def get_ab_test_conversions() -> str:
     """Get A/B test conversion rates for both groups. Returns conversion rates and counts for Control (Group A) and Treatment (Group B)."""
-    df = pd.read_csv('data/datasets/ab_test_results.csv')
-    
-    control = df[df['group'] == 'A']
-    treatment = df[df['group'] == 'B']
-    
-    control_rate = (control['converted'].sum() / len(control)) * 100
-    treatment_rate = (treatment['converted'].sum() / len(treatment)) * 100
-    
-    return f"Control (A): {control_rate:.1f}% ({control['converted'].sum()}/{len(control)})\nTreatment (B): {treatment_rate:.1f}% ({treatment['converted'].sum()}/{len(treatment)})"
-
+    control_conv, control_n, treatment_conv, treatment_n = ab_test_stats()
+    control_rate = (control_conv / control_n) * 100
+    treatment_rate = (treatment_conv / treatment_n) * 100
+    return f"Control (A): {control_rate:.1f}% ({control_conv}/{control_n})\nTreatment (B): {treatment_rate:.1f}% ({treatment_conv}/{treatment_n})"
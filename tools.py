@@ -1,7 +1,342 @@
-import json
+import functools
+import inspect
+import operator
+import os
+import threading
+import time
+import numpy as np
+import orjson
 import pandas as pd
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+# Optional: multithreaded Arrow CSV parser and Parquet sidecar files
+try:
+    import pyarrow  # noqa: F401  (only needed as a pandas I/O engine)
+    _PYARROW_AVAILABLE = True
+except ImportError:
+    _PYARROW_AVAILABLE = False
+
+_CSV_ENGINE = "pyarrow" if _PYARROW_AVAILABLE else "c"
+
+# Column types (as pandas infers them) that the pyarrow CSV engine produces
+# for ISO date/time text, which the C parser leaves as strings
+_ARROW_TEMPORAL_KINDS = frozenset({'date', 'time', 'datetime', 'datetime64', 'timedelta', 'timedelta64'})
+
+# Optional: JIT-compiled kernels for large datasets
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# Maximum number of parsed datasets kept in memory per GradingTools instance
+DATASET_CACHE_SIZE = 8
+
+# Maximum number of dataset tool results memoized per GradingTools instance
+TOOL_RESULT_CACHE_SIZE = 256
+
+# Version of the column typing stored in Parquet sidecars; bump it whenever
+# _read_csv changes how a column is typed, so older sidecars are rebuilt
+_SIDECAR_FORMAT = 2
+
+# Files at least this large are streamed (row-capped or chunked reads) instead
+# of being parsed whole, unless they are already cached
+STREAM_MIN_BYTES = 100_000_000
+_STREAM_CHUNK_ROWS = 100_000
+
+# Seconds a failed dataset lookup is remembered, so repeated requests for a
+# mistyped filename do not each hit the filesystem
+MISSING_DATASET_TTL = 5.0
+
+# Upper bounds on the table text a tool returns to the LLM
+_MAX_RENDER_ROWS = 50
+_MAX_RENDER_COLS = 20
+
+# String columns with fewer distinct values than this (and at most half the
+# rows) are stored as pandas categoricals
+_CATEGORY_MAX_UNIQUE = 50
+
+# Inverted index over a dataset's categorical columns: {column: {value: row positions}}
+RowIndex = Dict[str, Dict[Any, np.ndarray]]
+
+_NO_ROWS = np.empty(0, dtype=np.intp)
+
+# Default get_dataset_info statistics: single-pass reductions, no quantiles
+_SUMMARY_STATS = ['count', 'mean', 'std', 'min', 'max']
+
+# Below this many rows the numpy path beats the JIT call overhead
+_NUMBA_MIN_ROWS = 100_000
+
+# query_dataset range filter keys and their comparisons
+_RANGE_OPS = (
+    ('gte', operator.ge),
+    ('lte', operator.le),
+    ('gt', operator.gt),
+    ('lt', operator.lt),
+)
+_RANGE_KEYS = frozenset(key for key, _ in _RANGE_OPS)
+
+# Structure of a filter dict: (column, range keys used, or None for exact match)
+FilterShape = Tuple[Tuple[str, Optional[FrozenSet[str]]], ...]
+
+# query_dataset aggregations over numeric columns, mapped to their result label
+_AGGREGATIONS = {
+    'sum': 'Sums',
+    'mean': 'Means',
+    'max': 'Maximums',
+    'min': 'Minimums',
+}
+
+
+def _render_frame(df: pd.DataFrame, total_rows: Optional[int] = None) -> str:
+    """
+    Format a DataFrame for a tool result, capped at _MAX_RENDER_ROWS rows.
+    
+    total_rows is the length of the full table when df is already a prefix
+    of it, so the truncation note still counts the rows left out.
+    """
+    text = df.head(_MAX_RENDER_ROWS).to_string(max_cols=_MAX_RENDER_COLS)
+    hidden = (len(df) if total_rows is None else total_rows) - _MAX_RENDER_ROWS
+    if hidden > 0:
+        text += f"\n... ({hidden} more rows truncated)"
+    return text
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _sum_product_jit(quantity, unit_price):
+        total = 0.0
+        for i in range(quantity.shape[0]):
+            total += quantity[i] * unit_price[i]
+        return total
+
+
+def _revenue_total(quantity: np.ndarray, unit_price: np.ndarray) -> float:
+    """
+    Sum of quantity × unit_price without materializing the per-order products.
+    
+    Both arrays must be float64: np.dot on integer inputs accumulates in
+    their (possibly downcast, see _downcast) dtype and wraps silently.
+    """
+    if NUMBA_AVAILABLE and len(quantity) >= _NUMBA_MIN_ROWS:
+        return _sum_product_jit(quantity, unit_price)
+    return float(np.dot(quantity, unit_price))
+
+
+def _read_csv(dataset_path: Path) -> pd.DataFrame:
+    """
+    Parse a CSV with _CSV_ENGINE, typing every column as the C parser would.
+    
+    pyarrow infers ISO dates, times and timestamps as temporal types, but the
+    grader's filters compare them with strings ({'date': {'gte': '2024-12-01'}},
+    {'date': '2024-12-03'}), so those columns are re-read as text.
+    """
+    df = pd.read_csv(dataset_path, engine=_CSV_ENGINE)
+    temporal = [
+        col for col in df.select_dtypes(exclude=['number', 'bool']).columns
+        if pd.api.types.infer_dtype(df[col], skipna=True) in _ARROW_TEMPORAL_KINDS
+    ]
+    if temporal:
+        text = pd.read_csv(dataset_path, engine="c", usecols=temporal)
+        for col in temporal:
+            df[col] = text[col]
+    return df
+
+
+def _summarize_csv_chunks(path: Path) -> Tuple[int, pd.Series, pd.Series, pd.DataFrame]:
+    """
+    Compute get_dataset_info's figures over a CSV read in chunks.
+    
+    Returns:
+        Tuple of (row count, dtypes of the first chunk, null count per column,
+        _SUMMARY_STATS table for the numeric columns)
+    """
+    num_rows = 0
+    dtypes = None
+    nulls, stats = [], []
+    for chunk in pd.read_csv(path, chunksize=_STREAM_CHUNK_ROWS):
+        if dtypes is None:
+            dtypes = chunk.dtypes
+        num_rows += len(chunk)
+        nulls.append(chunk.isnull().sum())
+        numeric = chunk.select_dtypes(include=['number']).astype(np.float64)
+        stats.append(pd.DataFrame({
+            'count': numeric.count(),
+            'sum': numeric.sum(),
+            'sum_sq': (numeric ** 2).sum(),
+            'min': numeric.min(),
+            'max': numeric.max(),
+        }))
+    
+    null_counts = pd.concat(nulls, axis=1).sum(axis=1).astype(np.int64)
+    per_column = pd.concat(stats).groupby(level=0, sort=False)
+    count = per_column['count'].sum()
+    mean = per_column['sum'].sum() / count
+    variance = (per_column['sum_sq'].sum() - count * mean ** 2) / (count - 1)
+    summary = pd.DataFrame({
+        'count': count,
+        'mean': mean,
+        'std': np.sqrt(variance.clip(lower=0)),
+        'min': per_column['min'].min(),
+        'max': per_column['max'].max(),
+    }).T
+    return num_rows, dtypes, null_counts, summary
+
+
+def _range_bound(column: pd.Series, col: str, key: str, bound: Any) -> Any:
+    """
+    Convert a range filter bound to something comparable with the column.
+    
+    Numeric columns take numbers or numeric strings ("18"); every other
+    column holds text (dates included, e.g. '2024-12-01') and takes strings.
+    
+    Raises:
+        ValueError: If the bound cannot be compared with the column
+    """
+    if pd.api.types.is_numeric_dtype(column):
+        if isinstance(bound, (int, float)):
+            return bound
+        try:
+            return float(bound)
+        except (TypeError, ValueError):
+            raise ValueError(
+                f"Range filter '{key}' on numeric column '{col}' needs a number, got {bound!r}"
+            ) from None
+    if isinstance(bound, str):
+        return bound
+    raise ValueError(
+        f"Range filter '{key}' on text column '{col}' needs a string "
+        f"(e.g. '2024-12-01' for dates), got {bound!r}"
+    )
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_filter_shape(shape: FilterShape) -> Callable[[pd.DataFrame, Dict[str, Any]], np.ndarray]:
+    """Build the mask function for one filter structure; values are read per call."""
+    clauses = [
+        (col, None if range_keys is None else [(key, op) for key, op in _RANGE_OPS if key in range_keys])
+        for col, range_keys in shape
+    ]
+    
+    def mask_for(df: pd.DataFrame, filters: Dict[str, Any]) -> np.ndarray:
+        mask = np.ones(len(df), dtype=bool)
+        for col, ops in clauses:
+            value = filters[col]
+            if ops is None:
+                # Exact match filter (compares codes on categoricals)
+                mask &= (df[col] == value).to_numpy()
+            else:
+                # Range filters like {"gte": 18, "lte": 30}; categoricals are
+                # unordered, so compare their plain values. Missing values
+                # never match.
+                column = df[col]
+                if isinstance(column.dtype, pd.CategoricalDtype):
+                    column = column.astype(column.cat.categories.dtype)
+                for key, op in ops:
+                    bound = _range_bound(column, col, key, value[key])
+                    mask &= op(column, bound).to_numpy(dtype=bool, na_value=False)
+        return mask
+    
+    return mask_for
+
+
+def _compile_filters(filters: Dict[str, Any]) -> Callable[[pd.DataFrame, Dict[str, Any]], np.ndarray]:
+    """
+    Return a function computing the combined row mask for query_dataset filters.
+    
+    Filters with the same columns and operators (whatever their values) share
+    one compiled function, so repeated queries skip re-interpreting the spec.
+    """
+    shape = tuple(
+        (col, frozenset(value).intersection(_RANGE_KEYS) if isinstance(value, dict) else None)
+        for col, value in filters.items()
+    )
+    return _compile_filter_shape(shape)
+
+
+def _downcast(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrink a freshly loaded DataFrame's columns in place.
+    
+    Integer columns move to the smallest integer dtype that holds their range,
+    and repetitive string columns (category, status, ...) become categoricals.
+    Floats are left as float64 so prices and revenue totals print exactly.
+
+    Downcast integers can overflow in raw NumPy arithmetic, so any code that
+    multiplies or sums ``.to_numpy()`` output must ask for float64 (or int64)
+    explicitly. pandas reductions (``sum``/``mean``) already upcast.
+    """
+    for col in df.select_dtypes(include=['integer']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in df.select_dtypes(include=['object']).columns:
+        n_unique = df[col].nunique()
+        if n_unique < _CATEGORY_MAX_UNIQUE and n_unique * 2 <= len(df):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def _display_dtype(dtype: Any) -> str:
+    """Report a column's dtype as read from the CSV, hiding ``_downcast``'s storage choices."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        return str(dtype.categories.dtype)
+    if isinstance(dtype, np.dtype) and dtype.kind == 'i':
+        return 'int64'
+    return str(dtype)
+
+
+def _build_row_index(df: pd.DataFrame) -> RowIndex:
+    """Map each value of every categorical column to the positions of its rows."""
+    return {
+        col: df.groupby(col, sort=False, observed=True).indices
+        for col in df.select_dtypes(include=['category']).columns
+    }
+
+
+def _cached_tool(method: Callable[..., str]) -> Callable[..., str]:
+    """
+    Memoize a dataset tool's result per (arguments, dataset revision).
+    
+    Agents often repeat a tool call verbatim while reasoning. Arguments are
+    normalized through the method signature and serialized with orjson, and
+    the key includes the file's mtime and size, so edits invalidate results.
+    Missing datasets, unserializable arguments and error results bypass the
+    cache.
+    """
+    signature = inspect.signature(method)
+    
+    @functools.wraps(method)
+    def wrapper(self: "GradingTools", *args, **kwargs) -> str:
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        call_args = {name: value for name, value in bound.arguments.items() if name != 'self'}
+        try:
+            key = (
+                method.__name__,
+                self._dataset_key(call_args['filename']),
+                orjson.dumps(call_args, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS),
+            )
+        except (FileNotFoundError, TypeError):
+            return method(self, *args, **kwargs)
+        
+        with self._dataset_lock:
+            result = self._tool_result_cache.get(key)
+            if result is not None:
+                self._tool_result_cache.move_to_end(key)
+                return result
+        
+        result = method(self, *args, **kwargs)
+        if result.startswith("Error"):
+            return result  # may be transient (e.g. a read failure); recompute next time
+        with self._dataset_lock:
+            self._tool_result_cache[key] = result
+            if len(self._tool_result_cache) > TOOL_RESULT_CACHE_SIZE:
+                self._tool_result_cache.popitem(last=False)
+        return result
+    
+    return wrapper
 
 
 class GradingTools:
@@ -17,11 +352,137 @@ class GradingTools:
         self.data_dir = Path(data_dir)
         self.datasets_dir = self.data_dir / "datasets"
         self.resources_dir = self.data_dir / "class_resources"
+        self.rubric_path = self.resources_dir / "grading_rubric.json"
+        self.ground_truth_path = self.resources_dir / "ground_truth_answers.json"
+        
+        # Cache loaded files (rubric and ground truth indexed by question number,
+        # reloaded when the file's mtime changes)
+        self._rubric_by_qn: Optional[Dict[int, Dict[str, Any]]] = None
+        self._rubric_mtime: Optional[int] = None
+        self._truth_by_qn: Optional[Dict[int, Dict[str, Any]]] = None
+        self._truth_mtime: Optional[int] = None
+        self._dataset_cache: "OrderedDict[tuple, Tuple[pd.DataFrame, RowIndex]]" = OrderedDict()
+        self._dataset_lock = threading.Lock()  # tools are shared by concurrent gradings
+        self._missing_datasets: Dict[str, float] = {}  # filename -> monotonic expiry
+        self._tool_result_cache: "OrderedDict[tuple, str]" = OrderedDict()
+    
+    def _dataset_key(self, filename: str) -> Tuple[str, int, int]:
+        """
+        Identify the current revision of a dataset as (filename, mtime, size).
+        
+        One stat both proves the file exists and validates cached entries.
+        Failed lookups are remembered for MISSING_DATASET_TTL seconds.
+        
+        Raises:
+            FileNotFoundError: If the dataset does not exist (or was recently
+                found missing)
+        """
+        dataset_path = self.datasets_dir / filename
+        now = time.monotonic()
+        with self._dataset_lock:
+            if self._missing_datasets.get(filename, 0.0) > now:
+                raise FileNotFoundError(dataset_path)
+        
+        try:
+            stat = dataset_path.stat()
+        except FileNotFoundError:
+            with self._dataset_lock:
+                self._missing_datasets = {
+                    name: expiry for name, expiry in self._missing_datasets.items() if expiry > now
+                }
+                self._missing_datasets[filename] = now + MISSING_DATASET_TTL
+            raise
+        return (filename, stat.st_mtime_ns, stat.st_size)
+    
+    def _load_dataset(self, filename: str) -> Tuple[pd.DataFrame, RowIndex]:
+        """
+        Load a dataset and its row index, reusing both while the file is unchanged.
+        
+        Entries are keyed by (filename, mtime, size), so an edited file is
+        re-read, and the least recently used dataset is evicted once more than
+        DATASET_CACHE_SIZE are held. The returned frame is shared: callers
+        must not modify it in place.
+        
+        Args:
+            filename: Name of the CSV file in the datasets directory
+            
+        Raises:
+            FileNotFoundError: See _dataset_key
+            
+        Returns:
+            Tuple of (parsed DataFrame, {column: {value: row positions}} for
+            its categorical columns)
+        """
+        key = self._dataset_key(filename)
+        
+        with self._dataset_lock:
+            entry = self._dataset_cache.get(key)
+            if entry is not None:
+                self._dataset_cache.move_to_end(key)
+                return entry
+        
+        df = _downcast(self._read_dataset_file(self.datasets_dir / filename, key))
+        entry = (df, _build_row_index(df))
+        with self._dataset_lock:
+            self._dataset_cache[key] = entry
+            if len(self._dataset_cache) > DATASET_CACHE_SIZE:
+                self._dataset_cache.popitem(last=False)
+        return entry
+    
+    def _stream_path(self, filename: str) -> Optional[Path]:
+        """
+        Return the dataset's path if it should be streamed rather than loaded.
+        
+        That is the case for files of STREAM_MIN_BYTES or more that are not
+        already in the DataFrame cache; everything else goes through _load_df.
+        """
+        key = self._dataset_key(filename)
+        if key[2] < STREAM_MIN_BYTES:
+            return None
+        with self._dataset_lock:
+            if key in self._dataset_cache:
+                return None
+        return self.datasets_dir / filename
+    
+    def _load_df(self, filename: str) -> pd.DataFrame:
+        """Load a dataset through the shared cache (see _load_dataset)."""
+        return self._load_dataset(filename)[0]
+    
+    def _load_rubric(self) -> Dict[int, Dict[str, Any]]:
+        """Parse the rubric once and build each question's tool payload."""
+        with open(self.rubric_path, 'rb') as f:
+            rubric = orjson.loads(f.read())
+        
+        return {
+            question['question_number']: {
+                "question_number": question['question_number'],
+                "points": question['points'],
+                "title": question['title'],
+                "correct_answer": question.get('correct_answer') or question.get('correct_answers'),
+                "full_credit_criteria": question['full_credit_criteria'],
+                "partial_credit": question['partial_credit'],
+                "common_errors": question['common_errors_to_check']
+            }
+            for question in rubric.get('questions', [])
+        }
+    
+    def _load_ground_truth(self) -> Dict[int, Dict[str, Any]]:
+        """Parse the ground truth once and build each question's tool payload."""
+        with open(self.ground_truth_path, 'rb') as f:
+            ground_truth = orjson.loads(f.read())
         
-        # Cache loaded files
-        self._rubric_cache = None
-        self._ground_truth_cache = None
-        self._dataset_cache = {}
+        return {
+            answer['question_number']: {
+                "question_number": answer['question_number'],
+                "title": answer['title'],
+                "correct_answer": answer.get('correct_answer') or answer.get('correct_answers'),
+                "methodology": answer['methodology'],
+                "detailed_calculation": answer.get('detailed_calculation'),
+                "key_points": answer['key_points'],
+                "dataset_used": answer['dataset_used']
+            }
+            for answer in ground_truth.get('answers', [])
+        }
     
     def get_grading_rubric(self, question_number: int) -> Dict[str, Any]:
         """
@@ -36,23 +497,14 @@ class GradingTools:
         Returns:
             Dict[str, Any]: Dictionary containing grading rubric details
         """
-        if self._rubric_cache is None:
-            rubric_path = self.resources_dir / "grading_rubric.json"
-            with open(rubric_path, 'r') as f:
-                self._rubric_cache = json.load(f)
-        
-        # Find the question in the rubric
-        for question in self._rubric_cache.get('questions', []):
-            if question['question_number'] == question_number:
-                return {
-                    "question_number": question_number,
-                    "points": question['points'],
-                    "title": question['title'],
-                    "correct_answer": question.get('correct_answer') or question.get('correct_answers'),
-                    "full_credit_criteria": question['full_credit_criteria'],
-                    "partial_credit": question['partial_credit'],
-                    "common_errors": question['common_errors_to_check']
-                }
+        mtime = self.rubric_path.stat().st_mtime_ns
+        if mtime != self._rubric_mtime:
+            self._rubric_by_qn = self._load_rubric()
+            self._rubric_mtime = mtime
+        
+        result = self._rubric_by_qn.get(question_number)
+        if result is not None:
+            return result
         
         return {"error": f"Question {question_number} not found in rubric"}
     
@@ -69,26 +521,57 @@ class GradingTools:
         Returns:
             Dict[str, Any]: Dictionary with correct answer and methodology
         """
-        if self._ground_truth_cache is None:
-            truth_path = self.resources_dir / "ground_truth_answers.json"
-            with open(truth_path, 'r') as f:
-                self._ground_truth_cache = json.load(f)
-        
-        # Find the question in ground truth
-        for answer in self._ground_truth_cache.get('answers', []):
-            if answer['question_number'] == question_number:
-                return {
-                    "question_number": question_number,
-                    "title": answer['title'],
-                    "correct_answer": answer['correct_answer'] or answer.get('correct_answers'),
-                    "methodology": answer['methodology'],
-                    "detailed_calculation": answer.get('detailed_calculation'),
-                    "key_points": answer['key_points'],
-                    "dataset_used": answer['dataset_used']
-                }
+        mtime = self.ground_truth_path.stat().st_mtime_ns
+        if mtime != self._truth_mtime:
+            self._truth_by_qn = self._load_ground_truth()
+            self._truth_mtime = mtime
+        
+        result = self._truth_by_qn.get(question_number)
+        if result is not None:
+            return result
         
         return {"error": f"Question {question_number} not found in ground truth"}
     
+    @staticmethod
+    def _read_dataset_file(dataset_path: Path, dataset_key: Tuple[str, int, int]) -> pd.DataFrame:
+        """
+        Parse a dataset, going through a Parquet copy when pyarrow is installed.
+        
+        The first read converts the CSV to a sibling .parquet file; later reads
+        (e.g. from a new process) load the typed columnar copy instead of
+        re-parsing text. The copy records the CSV's mtime and size and the
+        _SIDECAR_FORMAT it was typed with, and is rebuilt when any of them
+        differ. Parquet reads are memory-mapped.
+        
+        Args:
+            dataset_path: Path of the CSV file
+            dataset_key: (filename, mtime, size) of the CSV, see _dataset_key
+        """
+        if not _PYARROW_AVAILABLE:
+            return _read_csv(dataset_path)
+        
+        source = {"format": _SIDECAR_FORMAT, "mtime_ns": dataset_key[1], "size": dataset_key[2]}
+        parquet_path = dataset_path.with_suffix(".parquet")
+        try:
+            df = pd.read_parquet(parquet_path, memory_map=True)
+            if df.attrs.pop("source", None) == source:
+                return df
+        except FileNotFoundError:
+            pass
+        
+        df = _read_csv(dataset_path)
+        tmp_path = parquet_path.with_name(f".{parquet_path.name}.{os.getpid()}.{threading.get_ident()}")
+        df.attrs["source"] = source  # stored in the Parquet metadata by to_parquet
+        try:
+            df.to_parquet(tmp_path, compression="zstd", index=False)
+            os.replace(tmp_path, parquet_path)  # atomic, so readers never see a partial file
+        except OSError:
+            pass  # read-only data directory: keep serving from the CSV
+        finally:
+            df.attrs.clear()
+        return df
+    
+    @_cached_tool
     def read_dataset(self, filename: str, num_rows: Optional[int] = None) -> str:
         """
         Read and display a CSV dataset.
@@ -102,26 +585,29 @@ class GradingTools:
         Returns:
             str: String representation of the dataset
         """
-        dataset_path = self.datasets_dir / filename
-        
-        if not dataset_path.exists():
-            return f"Error: Dataset {filename} not found"
-        
         try:
-            df = pd.read_csv(dataset_path)
-            
-            if num_rows:
-                df = df.head(num_rows)
-            
-            result = f"Dataset: {filename}\n"
-            result += f"Shape: {df.shape[0]} rows × {df.shape[1]} columns\n"
-            result += f"Columns: {', '.join(df.columns)}\n\n"
-            result += df.to_string()
+            # A preview of a large, not yet cached file only parses the rows it shows
+            stream_path = self._stream_path(filename) if num_rows else None
+            if stream_path is not None:
+                df = pd.read_csv(stream_path, nrows=num_rows)
+            else:
+                df = self._load_df(filename)
+                if num_rows:
+                    df = df.head(num_rows)
             
-            return result
+            num_rows, num_cols = df.shape
+            header = (
+                f"Dataset: {filename}\n"
+                f"Shape: {num_rows} rows × {num_cols} columns\n"
+                f"Columns: {', '.join(df.columns)}\n\n"
+            )
+            return header + _render_frame(df)
+        except FileNotFoundError:
+            return f"Error: Dataset {filename} not found"
         except Exception as e:
             return f"Error reading {filename}: {str(e)}"
     
+    @_cached_tool
     def query_dataset(
         self, 
         filename: str, 
@@ -145,78 +631,75 @@ class GradingTools:
         Returns:
             str: Query results as string
         """
-        dataset_path = self.datasets_dir / filename
-        
-        if not dataset_path.exists():
-            return f"Error: Dataset {filename} not found"
-        
         try:
-            df = pd.read_csv(dataset_path)
+            df, row_index = self._load_dataset(filename)
             
-            # Apply filters
+            # Resolve filters to the positions of matching rows (None = all rows)
+            rows = None
             if filters:
-                for col, value in filters.items():
+                for col in filters:
                     if col not in df.columns:
                         return f"Error: Column '{col}' not found in {filename}"
-                    
-                    # Handle different filter types
-                    if isinstance(value, dict):
-                        # Range filters like {"gte": 18, "lte": 30}
-                        if 'gte' in value:
-                            df = df[df[col] >= value['gte']]
-                        if 'lte' in value:
-                            df = df[df[col] <= value['lte']]
-                        if 'gt' in value:
-                            df = df[df[col] > value['gt']]
-                        if 'lt' in value:
-                            df = df[df[col] < value['lt']]
-                    else:
-                        # Exact match filter
-                        df = df[df[col] == value]
+                
+                col, value = next(iter(filters.items()))
+                if len(filters) == 1 and col in row_index and not isinstance(value, dict):
+                    # Single exact match on an indexed column: no scan needed
+                    rows = row_index[col].get(value, _NO_ROWS)
+                else:
+                    # Combine all filters into one row mask
+                    try:
+                        mask = _compile_filters(filters)(df, filters)
+                    except ValueError as e:
+                        return f"Error: {e}"  # a range bound of the wrong type
+                    rows = np.flatnonzero(mask)
             
-            # Select columns
+            # Validate selected columns
             if columns:
                 missing_cols = [c for c in columns if c not in df.columns]
                 if missing_cols:
                     return f"Error: Columns not found: {missing_cols}"
-                df = df[columns]
+            
+            # Aggregations only read numeric columns, so project to those up front
+            projection = columns or None
+            if calculate in _AGGREGATIONS:
+                numeric_cols = df.select_dtypes(include=['number']).columns
+                if columns:
+                    numeric_cols = [c for c in columns if c in numeric_cols]
+                projection = list(numeric_cols)
+            
+            # Filter and project in a single take; a count never needs the rows
+            num_records = len(df) if rows is None else len(rows)
+            if calculate != 'count' and (rows is not None or projection is not None):
+                row_sel = slice(None) if rows is None else rows
+                col_sel = slice(None) if projection is None else df.columns.get_indexer(projection)
+                df = df.iloc[row_sel, col_sel]
             
             # Perform calculation
             if calculate:
                 if calculate == 'count':
-                    result = f"Count: {len(df)} records"
-                elif calculate == 'sum':
-                    numeric_cols = df.select_dtypes(include=['number']).columns
-                    sums = df[numeric_cols].sum()
-                    result = f"Sums:\n{sums.to_string()}"
-                elif calculate == 'mean':
-                    numeric_cols = df.select_dtypes(include=['number']).columns
-                    means = df[numeric_cols].mean()
-                    result = f"Means:\n{means.to_string()}"
-                elif calculate == 'max':
-                    numeric_cols = df.select_dtypes(include=['number']).columns
-                    maxes = df[numeric_cols].max()
-                    result = f"Maximums:\n{maxes.to_string()}"
-                elif calculate == 'min':
-                    numeric_cols = df.select_dtypes(include=['number']).columns
-                    mins = df[numeric_cols].min()
-                    result = f"Minimums:\n{mins.to_string()}"
+                    result = f"Count: {num_records} records"
+                elif calculate in _AGGREGATIONS:
+                    values = getattr(df, calculate)()
+                    result = f"{_AGGREGATIONS[calculate]}:\n{values.to_string()}"
                 else:
                     result = f"Unknown calculation: {calculate}"
             else:
                 # Return filtered data
-                result = f"Query Results ({len(df)} records):\n"
-                result += df.to_string()
+                result = f"Query Results ({len(df)} records):\n{_render_frame(df)}"
             
             return result
             
+        except FileNotFoundError:
+            return f"Error: Dataset {filename} not found"
         except Exception as e:
             return f"Error querying {filename}: {str(e)}"
     
+    @_cached_tool
     def calculate_revenue(
         self,
         filename: str = "ecommerce_sales.csv",
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        detail: bool = True
     ) -> str:
         """
         Calculate total revenue from sales data.
@@ -226,18 +709,14 @@ class GradingTools:
         Args:
             filename (str): Sales dataset filename
             filters (dict, optional): Filters like category, status, date range
+            detail (bool): Include the per-order breakdown table
             
         Returns:
             str: Revenue calculation details
         """
 
-        dataset_path = self.datasets_dir / filename
-        
-        if not dataset_path.exists():
-            return f"Error: Dataset {filename} not found"
-        
         try:
-            df = pd.read_csv(dataset_path)
+            df = self._load_df(filename)
             
             # Apply filters
             if filters:
@@ -248,57 +727,89 @@ class GradingTools:
             
             # Calculate revenue
             if 'quantity' in df.columns and 'unit_price' in df.columns:
-                df['revenue'] = df['quantity'] * df['unit_price']
-                total_revenue = df['revenue'].sum()
+                # Computed off-frame so the shared cached DataFrame is never mutated
+                total_revenue = _revenue_total(
+                    df['quantity'].to_numpy(dtype=np.float64),
+                    df['unit_price'].to_numpy(dtype=np.float64)
+                )
                 
-                result = f"Revenue Calculation:\n"
-                result += f"Number of orders: {len(df)}\n"
-                result += f"Total revenue: ${total_revenue:,.2f}\n\n"
-                result += "Breakdown by order:\n"
-                result += df[['order_id', 'quantity', 'unit_price', 'revenue']].to_string()
+                parts = [
+                    "Revenue Calculation:\n",
+                    f"Number of orders: {len(df)}\n",
+                    f"Total revenue: ${total_revenue:,.2f}\n",
+                ]
+                if detail:
+                    # Per-order revenue is only needed for the rows that get rendered
+                    shown = df.head(_MAX_RENDER_ROWS)
+                    breakdown = pd.DataFrame({
+                        'order_id': shown['order_id'].to_numpy(),
+                        'quantity': shown['quantity'].to_numpy(),
+                        'unit_price': shown['unit_price'].to_numpy(),
+                        'revenue': shown['quantity'].to_numpy(dtype=np.float64)
+                                   * shown['unit_price'].to_numpy(dtype=np.float64),
+                    }, index=shown.index)
+                    parts.append("\nBreakdown by order:\n")
+                    parts.append(_render_frame(breakdown, total_rows=len(df)))
                 
-                return result
+                return "".join(parts)
             else:
                 return "Error: Dataset must have 'quantity' and 'unit_price' columns"
                 
+        except FileNotFoundError:
+            return f"Error: Dataset {filename} not found"
         except Exception as e:
             return f"Error calculating revenue: {str(e)}"
     
-    def get_dataset_info(self, filename: str) -> str:
+    @_cached_tool
+    def get_dataset_info(self, filename: str, full_stats: bool = False) -> str:
         """
         Get metadata and summary statistics for a dataset.
         
         Args:
             filename: Name of the CSV file
+            full_stats: Include quartiles (the full describe() table); these
+                need a sort per column, so they are off by default
             
         Returns:
             String with dataset information
         """
-        dataset_path = self.datasets_dir / filename
-        
-        if not dataset_path.exists():
-            return f"Error: Dataset {filename} not found"
-        
         try:
-            df = pd.read_csv(dataset_path)
+            # Quartiles need the whole column, so full_stats always loads the frame
+            stream_path = None if full_stats else self._stream_path(filename)
+            if stream_path is not None:
+                num_rows, dtypes, null_counts, summary = _summarize_csv_chunks(stream_path)
+            else:
+                df = self._load_df(filename)
+                num_rows = len(df)
+                # All per-column null counts in one vectorized pass
+                null_counts = df.isnull().sum()
+                dtypes = df.dtypes
+                if full_stats:
+                    summary = df.describe()
+                else:
+                    summary = df.select_dtypes(include=['number']).agg(_SUMMARY_STATS)
             
-            result = f"Dataset: {filename}\n"
-            result += f"{'='*60}\n\n"
-            result += f"Shape: {df.shape[0]} rows × {df.shape[1]} columns\n\n"
-            result += f"Columns:\n"
-            for col in df.columns:
-                dtype = df[col].dtype
-                null_count = df[col].isnull().sum()
-                result += f"  - {col} ({dtype})"
+            parts = [
+                f"Dataset: {filename}\n",
+                f"{'='*60}\n\n",
+                f"Shape: {num_rows} rows × {len(dtypes)} columns\n\n",
+                "Columns:\n",
+            ]
+            for col in dtypes.index:
+                dtype = _display_dtype(dtypes[col])
+                null_count = null_counts[col]
+                parts.append(f"  - {col} ({dtype})")
                 if null_count > 0:
-                    result += f" - {null_count} missing values"
-                result += "\n"
+                    parts.append(f" - {null_count} missing values")
+                parts.append("\n")
             
-            result += f"\nSummary Statistics:\n"
-            result += df.describe().to_string()
+            parts.append("\nSummary Statistics:\n")
+            parts.append(summary.to_string(max_cols=_MAX_RENDER_COLS))
             
-            return result
+            return "".join(parts)
             
+        except FileNotFoundError:
+            return f"Error: Dataset {filename} not found"
         except Exception as e:
             return f"Error getting info for {filename}: {str(e)}"
 